@@ -0,0 +1,162 @@
+"""JSON API with cursor pagination, field projection and ETag revalidation"""
+import base64
+import binascii
+import math
+
+from flask import Blueprint, jsonify, request, session
+
+# Fields returned when the client does not pass ?fields=; Description is long
+DEFAULT_FIELDS = [
+    'ID', 'URL', 'Name', 'Icon URL', 'Average User Rating',
+    'User Rating Count', 'Primary Genre', 'Genres', 'Developer'
+]
+
+PROJECTABLE_FIELDS = set(DEFAULT_FIELDS) | {'Description'}
+
+DEFAULT_PAGE_SIZE = 10
+MAX_PAGE_SIZE = 100
+
+# Deepest position any cursor can reach in a ranked list
+MAX_RANKED_RESULTS = 500
+
+
+class ApiError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+def encode_cursor(offset):
+    return base64.urlsafe_b64encode(str(offset).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    if not cursor:
+        return 0
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        offset = int(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ApiError('Invalid cursor') from None
+    if offset < 0 or offset >= MAX_RANKED_RESULTS:
+        raise ApiError('Invalid cursor')
+    return offset
+
+
+def page_size():
+    try:
+        limit = int(request.args.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise ApiError('limit must be an integer') from None
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ApiError(f'limit must be between 1 and {MAX_PAGE_SIZE}')
+    return limit
+
+
+def requested_fields():
+    fields = request.args.get('fields')
+    if not fields:
+        return DEFAULT_FIELDS
+    fields = [field.strip() for field in fields.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in PROJECTABLE_FIELDS]
+    if unknown:
+        raise ApiError(f"Unknown fields: {', '.join(unknown)}")
+    return fields
+
+
+def facet_filters(names=('genre', 'tag', 'developer')):
+    """Facet query arguments, with absent or empty ones as None"""
+    return {name: request.args.get(name) or None for name in names}
+
+
+def _json_value(value):
+    """NumPy scalars to Python, NaN/NA to null"""
+    if hasattr(value, 'item'):
+        value = value.item()
+    try:
+        if value is None or (isinstance(value, float) and math.isnan(value)) or value != value:
+            return None
+    except TypeError:
+        # pd.NA refuses boolean comparison
+        return None
+    return value
+
+
+def project(record, fields):
+    return {field: _json_value(record.get(field)) for field in fields}
+
+
+def conditional_json(payload, cache_control='no-cache'):
+    """JSON response that answers If-None-Match with 304 when unchanged"""
+    response = jsonify(payload)
+    response.headers['Cache-Control'] = cache_control
+    response.add_etag()
+    return response.make_conditional(request)
+
+
+def paginate(fetch, total=None):
+    """One page of a ranked list; fetch(n) returns its first n records.
+
+    total(), if given, returns the list's full length; otherwise one record
+    past the page is fetched to tell whether another page exists.
+    """
+    offset = decode_cursor(request.args.get('cursor'))
+    limit = page_size()
+    fields = requested_fields()
+
+    if total is None:
+        records = fetch(min(offset + limit + 1, MAX_RANKED_RESULTS))
+        length = len(records)
+    else:
+        records = fetch(min(offset + limit, MAX_RANKED_RESULTS))
+        length = total()
+    page = records[offset:offset + limit]
+    next_offset = offset + len(page)
+    has_more = length > next_offset and next_offset < MAX_RANKED_RESULTS
+    return {
+        'items': [project(record, fields) for record in page],
+        'next_cursor': encode_cursor(next_offset) if has_more else None
+    }
+
+
+def create_api(recommender, recommend):
+    """Blueprint serving `recommender`; recommend(user_id, top_n, **filters) ranks a user's games"""
+    api = Blueprint('api', __name__, url_prefix='/api')
+
+    @api.errorhandler(ApiError)
+    def api_error(error):
+        return jsonify({'error': error.message}), error.status
+
+    @api.route('/recommendations')
+    def recommendations():
+        if 'user_id' not in session:
+            raise ApiError('Login required', 401)
+        user_id = session['user_id']
+        filters = facet_filters()
+        # Asking for exactly the page lets recommend() serve it from the
+        # precomputed rows; unfiltered rankings know their length up front
+        total = None
+        if not any(value is not None for value in filters.values()):
+            def total():
+                return recommender.ranking_length(user_id)
+        payload = paginate(lambda n: recommend(user_id, n, **filters), total)
+        return conditional_json(payload, 'private, no-cache')
+
+    @api.route('/popular')
+    def popular():
+        filters = facet_filters()
+        payload = paginate(lambda n: recommender.get_popular_games(n, **filters))
+        return conditional_json(payload)
+
+    @api.route('/games/<int:game_id>')
+    def game(game_id):
+        record = recommender.get_game_by_id(game_id)
+        if record is None:
+            raise ApiError('Game not found', 404)
+        fields = request.args.get('fields')
+        # A single game defaults to every field, including Description
+        fields = requested_fields() if fields else sorted(PROJECTABLE_FIELDS)
+        return conditional_json(project(record, fields))
+
+    return api
@@ -1,18 +1,90 @@
-from flask import Flask, render_template, request, redirect, url_for, session, flash
+from flask import Flask, render_template, request, redirect, url_for, session, flash, g, jsonify, abort
 from werkzeug.security import generate_password_hash, check_password_hash
 import sqlite3
-import pandas as pd
 import os
-from recommender import GameRecommender
+import time
+import atexit
+import db
+import metrics
+from interaction_log import InteractionWriter
+from recommender import DEFAULT_CF_WEIGHT, GameRecommender
+from collaborative import ALSModel
+from catalogue import games_table_writer
+from api import create_api, facet_filters
 
 app = Flask(__name__)
 app.secret_key = 'your_secret_key_here'
 
 # Initialize recommender with both data files
 # At the top of app.py
-recommender = GameRecommender('data/Game_processed_data.csv')
+# RECOMMENDER_ENGINE selects the neighbour search: 'exact' or approximate 'ivf';
+# RECOMMENDER_JOBS sets the processes used when the index has to be built.
+# On first start the games table is bulk-loaded from the same CSV pass.
+with db.get_pool().connection() as games_conn:
+    games_table_exists = games_conn.execute(
+        "SELECT name FROM sqlite_master WHERE type='table' AND name='games'"
+    ).fetchone()
+    recommender = GameRecommender(
+        'data/Game_processed_data.csv',
+        engine=os.environ.get('RECOMMENDER_ENGINE', 'exact'),
+        n_jobs=int(os.environ.get('RECOMMENDER_JOBS', 1)),
+        on_chunk=None if games_table_exists else games_table_writer(games_conn)
+    )
+    if not games_table_exists:
+        games_conn.commit()
+        print("Games table created from CSV")
+
+# Blend in the collaborative-filtering model when train_cf.py has produced one
+CF_MODEL_PATH = os.environ.get('RECOMMENDER_CF_MODEL', 'data/cache/cf')
+if os.path.exists(os.path.join(CF_MODEL_PATH, 'model.json')):
+    recommender.attach_collaborative(
+        ALSModel.load(CF_MODEL_PATH),
+        float(os.environ.get('RECOMMENDER_CF_WEIGHT', DEFAULT_CF_WEIGHT))
+    )
+
+# View events are batched off the request path; flush what is left on exit
+interaction_writer = InteractionWriter()
+atexit.register(interaction_writer.close)
+
+# Sampled cProfile dumps; the rate can be changed at runtime via /metrics/profiling
+profiler = metrics.RequestProfiler(os.environ.get('RECOMMENDER_PROFILE_DIR', 'data/profiles'))
+profiler.rate = float(os.environ.get('RECOMMENDER_PROFILE_RATE', 0))
+
+def get_db():
+    """Pooled connection for the current request, returned on teardown"""
+    if 'db' not in g:
+        g.db = db.get_pool().acquire()
+    return g.db
+
+@app.teardown_appcontext
+def release_db(exception):
+    conn = g.pop('db', None)
+    if conn is not None:
+        db.get_pool().release(conn)
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    g.profile = profiler.start()
+
+@app.teardown_request
+def record_request_time(exception):
+    # Teardown also runs for requests that raised, so a sampled profile is always stopped
+    endpoint = request.endpoint or 'unmatched'
+    profile = g.pop('profile', None)
+    if profile is not None:
+        profiler.stop(profile, endpoint)
+    start = g.pop('request_start', None)
+    if start is not None:
+        metrics.observe('app_request_seconds', time.perf_counter() - start, endpoint=endpoint)
+
+def render(template, **context):
+    """render_template with its time recorded per template"""
+    with metrics.timer('app_render_seconds', template=template):
+        return render_template(template, **context)
+
 def check_db_tables():
-    conn = sqlite3.connect('data/recommendations.db')
+    conn = db.get_pool().acquire()
     c = conn.cursor()
     
     c.execute("SELECT name FROM sqlite_master WHERE type='table'")
@@ -25,10 +97,10 @@ def check_db_tables():
     except sqlite3.Error as e:
         print("Interactions table error:", e)
     
-    conn.close()
+    db.get_pool().release(conn)
 
 def init_db():
-    conn = sqlite3.connect('data/recommendations.db')
+    conn = db.get_pool().acquire()
     c = conn.cursor()
     
     # Users table
@@ -46,39 +118,92 @@ def init_db():
                   timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
                   FOREIGN KEY(user_id) REFERENCES users(id))''')
     
-    # Create games table from CSV if it doesn't exist
-    if not c.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='games'").fetchone():
-        games_df = pd.read_csv('data/Game_processed_data.csv')
-        games_df.to_sql('games', conn, if_exists='replace', index=False)
-        print("Games table created from CSV")
-    
     conn.commit()
-    conn.close()
+    db.migrate(conn)
+    db.get_pool().release(conn)
 
 init_db()
 check_db_tables()
 
+def get_precomputed_recommendations(user_id, top_n=10):
+    """Top-N written by batch_recommend.py, read with one primary-key range scan"""
+    with metrics.timer('app_db_seconds', query='precomputed'):
+        c = get_db().cursor()
+        c.execute('''SELECT game_url FROM precomputed_recommendations
+                     WHERE user_id = ? ORDER BY rank LIMIT ?''', (user_id, top_n))
+        rows = c.fetchall()
+    games = (recommender.get_game_details(url) for url, in rows)
+    return [game for game in games if game]
+
+def recommend(user_id, top_n=10, **filters):
+    """Precomputed batch results when they cover top_n, else live scoring.
+
+    Facet filters (genre, tag, developer) always go to live scoring, since
+    the batch lists are unfiltered.
+    """
+    if not any(value is not None for value in filters.values()):
+        recommendations = get_precomputed_recommendations(user_id, top_n)
+        if len(recommendations) >= top_n:
+            return recommendations
+    return recommender.get_recommendations(user_id, top_n=top_n, **filters)
+
+app.register_blueprint(create_api(recommender, recommend))
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus text format; cache and interaction-log counters are read at scrape time"""
+    cache = recommender.rec_cache.stats()
+    gauges = [
+        ('recommender_cache_entries', 'gauge', cache['size'], {}),
+        ('recommender_cache_hits_total', 'counter', cache['hits'], {}),
+        ('recommender_cache_misses_total', 'counter', cache['misses'], {}),
+        ('recommender_cache_evictions_total', 'counter', cache['evictions'], {}),
+        ('interaction_log_written_total', 'counter', interaction_writer.written, {}),
+        ('interaction_log_dropped_total', 'counter', interaction_writer.dropped, {}),
+        ('interaction_log_failed_total', 'counter', interaction_writer.failed, {}),
+        ('profiler_sample_rate', 'gauge', profiler.rate, {})
+    ]
+    return metrics.render(gauges), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
+@app.route('/metrics/profiling', methods=['GET', 'POST'])
+def profiling():
+    """Show or set the share of requests profiled; POST rate=0.05, rate=0 turns it off"""
+    # Local access only; dumps contain code paths and timings
+    if request.remote_addr not in ('127.0.0.1', '::1'):
+        abort(403)
+    if request.method == 'POST':
+        try:
+            rate = float(request.values.get('rate', ''))
+        except ValueError:
+            return jsonify({'error': 'rate must be a number'}), 400
+        if not 0 <= rate <= 1:
+            return jsonify({'error': 'rate must be between 0 and 1'}), 400
+        profiler.rate = rate
+    return jsonify({'rate': profiler.rate, 'directory': profiler.output_dir,
+                    'recent': profiler.recent()[-10:]})
+
 @app.route('/register', methods=['GET', 'POST'])
 def register():
     if request.method == 'POST':
         username = request.form['username']
         password = request.form['password']
         
-        conn = sqlite3.connect('data/recommendations.db')
+        conn = get_db()
         c = conn.cursor()
         
+        password_hash = generate_password_hash(password)
         try:
-            c.execute("INSERT INTO users (username, password) VALUES (?, ?)",
-                      (username, generate_password_hash(password)))
-            conn.commit()
+            with metrics.timer('app_db_seconds', query='register'):
+                c.execute("INSERT INTO users (username, password) VALUES (?, ?)",
+                          (username, password_hash))
+                conn.commit()
             flash('Registration successful! Please login.', 'success')
             return redirect(url_for('login'))
         except sqlite3.IntegrityError:
+            conn.rollback()
             flash('Username already exists.', 'danger')
-        finally:
-            conn.close()
     
-    return render_template('register.html')
+    return render('register.html')
 
 # User login
 @app.route('/login', methods=['GET', 'POST'])
@@ -87,11 +212,10 @@ def login():
         username = request.form['username']
         password = request.form['password']
         
-        conn = sqlite3.connect('data/recommendations.db')
-        c = conn.cursor()
-        c.execute("SELECT id, password FROM users WHERE username = ?", (username,))
-        user = c.fetchone()
-        conn.close()
+        with metrics.timer('app_db_seconds', query='login'):
+            c = get_db().cursor()
+            c.execute("SELECT id, password FROM users WHERE username = ?", (username,))
+            user = c.fetchone()
         
         if user and check_password_hash(user[1], password):
             session['user_id'] = user[0]
@@ -101,7 +225,7 @@ def login():
         else:
             flash('Invalid username or password.', 'danger')
     
-    return render_template('login.html')
+    return render('login.html')
 
 @app.route('/')
 def index():
@@ -109,11 +233,12 @@ def index():
         return redirect(url_for('login'))
     
     user_id = session['user_id']
-    recommendations = recommender.get_recommendations(user_id, top_n=10)
+    # Optional ?genre=, ?tag= and ?developer= narrow the list
+    recommendations = recommend(user_id, top_n=10, **facet_filters())
     
-    return render_template('index.html', 
-                         games=recommendations,
-                         username=session.get('username'))
+    return render('index.html', 
+                  games=recommendations,
+                  username=session.get('username'))
 
 @app.route('/game/<game_name>')
 def game_detail(game_name):
@@ -123,31 +248,16 @@ def game_detail(game_name):
     user_id = session['user_id']
     
     # Get game details from recommender
-    game_details = None
-    for game in recommender.games_df.to_dict('records'):
-        if game['Name'].lower() == game_name.lower():
-            game_details = game
-            break
+    game_details = recommender.get_game_by_name(game_name)
     
     if not game_details:
         flash('Game not found', 'danger')
         return redirect(url_for('index'))
     
     # Track view interaction
-    conn = sqlite3.connect('data/recommendations.db')
-    c = conn.cursor()
-    try:
-        c.execute("""INSERT INTO interactions 
-                    (user_id, game_url, interaction_type) 
-                    VALUES (?, ?, 'view')""",
-                    (user_id, game_details['URL']))
-        conn.commit()
-    except sqlite3.Error as e:
-        print("Error logging view:", e)
-    finally:
-        conn.close()
+    interaction_writer.log_view(user_id, game_details['URL'])
     
-    return render_template('game_detail.html', game=game_details)
+    return render('game_detail.html', game=game_details)
 
 @app.route('/rate/<game_name>', methods=['POST'])
 def rate_game(game_name):
@@ -165,8 +275,7 @@ def rate_game(game_name):
             return redirect(url_for('game_detail', game_name=game_name))
 
         # Get game URL from name
-        game = next((g for g in recommender.games_df.to_dict('records') 
-                   if g['Name'].lower() == game_name.lower()), None)
+        game = recommender.get_game_by_name(game_name)
         
         if not game:
             flash('Game not found', 'danger')
@@ -175,38 +284,29 @@ def rate_game(game_name):
         game_url = game['URL']
 
         # Database operations
-        conn = sqlite3.connect('data/recommendations.db')
+        conn = get_db()
         c = conn.cursor()
         
         try:
-            # Check for existing rating
-            c.execute('''SELECT rowid FROM interactions 
-                        WHERE user_id=? AND game_url=? AND interaction_type='rating' ''',
-                     (user_id, game_url))
-            existing = c.fetchone()
-
-            if existing:
-                # Update existing rating
-                c.execute('''UPDATE interactions SET value=?, timestamp=CURRENT_TIMESTAMP
-                           WHERE rowid=?''',
-                         (rating, existing[0]))
-            else:
-                # Insert new rating
+            with metrics.timer('app_db_seconds', query='rate'):
+                # Insert or replace the user's rating in one statement
                 c.execute('''INSERT INTO interactions 
                            (user_id, game_url, interaction_type, value)
-                           VALUES (?, ?, 'rating', ?)''',
+                           VALUES (?, ?, 'rating', ?)
+                           ON CONFLICT (user_id, game_url) WHERE interaction_type = 'rating'
+                           DO UPDATE SET value = excluded.value, timestamp = CURRENT_TIMESTAMP''',
                          (user_id, game_url, rating))
+                # The batch top-N no longer reflects this user's ratings
+                c.execute("DELETE FROM precomputed_recommendations WHERE user_id = ?", (user_id,))
 
-            conn.commit()
+                conn.commit()
+            recommender.invalidate_user(user_id)
             flash('Rating saved successfully!', 'success')
             
         except sqlite3.Error as e:
             conn.rollback()
             print(f"Database error: {e}")
             flash('Failed to save rating due to a database error', 'danger')
-            
-        finally:
-            conn.close()
 
     except ValueError:
         flash('Invalid rating value', 'danger')
@@ -0,0 +1,158 @@
+"""Precompute recommendations for every user who has rated a game.
+
+Ratings are streamed from the database in one query into a sparse
+user x game matrix, scored in chunks by a process pool, and the top-N per
+user replaces the contents of the precomputed_recommendations table.
+Users who rate while the batch runs are left out, so their next request is
+scored live instead of from a list built on their older ratings.
+
+Usage: python batch_recommend.py [--top-n 10] [--workers 4] [--chunk-users 500]
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+import db
+from collaborative import ALSModel
+from neighbors import SIMILARITY_BLOCK_CELLS
+from recommender import DEFAULT_CF_WEIGHT, GameRecommender
+
+# Rows pulled from the cursor per fetchmany call
+FETCH_SIZE = 10000
+
+_worker = None
+
+
+def rating_versions(conn):
+    """{user_id: (rating count, newest rating timestamp)}; changes whenever a user rates"""
+    cursor = conn.execute('''SELECT user_id, COUNT(*), MAX(timestamp) FROM interactions
+                             WHERE interaction_type = 'rating' GROUP BY user_id''')
+    return {user_id: (count, latest) for user_id, count, latest in cursor}
+
+
+def load_rating_matrix(conn, game_id_to_idx, n_games):
+    """(user_ids, users x games CSR, rating_versions) from all ratings, in one streamed query"""
+    # One read transaction, so the versions describe exactly the ratings read
+    conn.execute('BEGIN')
+    try:
+        versions = rating_versions(conn)
+        cursor = conn.execute('''SELECT user_id, game_url, value FROM interactions
+                                 WHERE interaction_type = 'rating' ORDER BY user_id''')
+        users, cols, values = [], [], []
+        while True:
+            rows = cursor.fetchmany(FETCH_SIZE)
+            if not rows:
+                break
+            for user_id, game_url, value in rows:
+                idx = game_id_to_idx.get(game_url)
+                # Games no longer in the catalogue are dropped, as in the live path
+                if idx is not None:
+                    users.append(user_id)
+                    cols.append(idx)
+                    values.append(value)
+    finally:
+        conn.rollback()
+
+    user_ids, user_rows = np.unique(np.asarray(users, dtype=np.int64), return_inverse=True)
+    matrix = csr_matrix(
+        (np.asarray(values, dtype=np.float32), (user_rows, np.asarray(cols, dtype=np.int64))),
+        shape=(len(user_ids), n_games)
+    )
+    return user_ids.tolist(), matrix, versions
+
+
+def _init_worker(data_path, engine, cf_model_path, cf_weight):
+    # Workers open the artifact the parent saved, so the index is shared via mmap
+    global _worker
+    _worker = GameRecommender(data_path, engine=engine)
+    if cf_model_path:
+        _worker.attach_collaborative(ALSModel.load(cf_model_path), cf_weight)
+
+
+def _score_chunk(user_ids, ratings, top_n):
+    rows, scores = _worker.recommend_batch(user_ids, ratings, top_n)
+    results = []
+    for user_id, user_rows, user_scores in zip(user_ids, rows, scores):
+        for rank, (idx, score) in enumerate(zip(user_rows, user_scores)):
+            if np.isfinite(score):
+                results.append((user_id, rank, _worker.idx_to_game_id[idx], float(score)))
+    return results
+
+
+def write_recommendations(conn, results, versions):
+    """Replace the table contents in one transaction, so readers never see a partial set.
+
+    Users whose ratings changed since `versions` was read are skipped; rate_game
+    already deleted their rows, and writing them back would serve a stale list.
+    Returns (rows written, users skipped).
+    """
+    # IMMEDIATE takes the write lock first, so no rating can land between check and write
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        current = rating_versions(conn)
+        stale = {user_id for user_id, version in versions.items() if current.get(user_id) != version}
+        rows = [row for row in results if row[0] not in stale]
+        conn.execute('DELETE FROM precomputed_recommendations')
+        conn.executemany('''INSERT INTO precomputed_recommendations
+                            (user_id, rank, game_url, score) VALUES (?, ?, ?, ?)''', rows)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return len(rows), len(stale)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--data', default='data/Game_processed_data.csv')
+    parser.add_argument('--engine', default=os.environ.get('RECOMMENDER_ENGINE', 'exact'))
+    parser.add_argument('--cf-model', default=os.environ.get('RECOMMENDER_CF_MODEL', 'data/cache/cf'))
+    parser.add_argument('--top-n', type=int, default=10)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--chunk-users', type=int, default=None,
+                        help='users per task (default: sized to the dense block budget)')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    recommender = GameRecommender(args.data, engine=args.engine)
+    recommender.save_artifact()
+    cf_model_path = args.cf_model if os.path.exists(os.path.join(args.cf_model, 'model.json')) else None
+    cf_weight = float(os.environ.get('RECOMMENDER_CF_WEIGHT', DEFAULT_CF_WEIGHT))
+
+    pool = db.get_pool()
+    with pool.connection() as conn:
+        db.migrate(conn)
+        user_ids, ratings, versions = load_rating_matrix(
+            conn, recommender.game_id_to_idx, len(recommender.games_df)
+        )
+    print(f"Loaded {ratings.nnz} ratings from {len(user_ids)} users")
+
+    n_games = len(recommender.games_df)
+    chunk = args.chunk_users or max(1, SIMILARITY_BLOCK_CELLS // max(1, n_games))
+    results = []
+    with ProcessPoolExecutor(
+        max_workers=args.workers,
+        initializer=_init_worker,
+        initargs=(args.data, args.engine, cf_model_path, cf_weight)
+    ) as executor:
+        futures = [
+            executor.submit(_score_chunk, user_ids[lo:lo + chunk], ratings[lo:lo + chunk], args.top_n)
+            for lo in range(0, len(user_ids), chunk)
+        ]
+        for future in futures:
+            results.extend(future.result())
+
+    with pool.connection() as conn:
+        written, skipped = write_recommendations(conn, results, versions)
+    print(f"Wrote {written} recommendations for {len(user_ids)} users "
+          f"in {time.perf_counter() - start:.1f}s")
+    if skipped:
+        print(f"Skipped {skipped} users who rated during the run; they are scored live")
+
+
+if __name__ == '__main__':
+    main()
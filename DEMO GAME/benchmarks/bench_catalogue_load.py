@@ -0,0 +1,101 @@
+"""Load time and peak memory of catalogue ingestion, whole-file vs chunked.
+
+Each run happens in a fresh process covering CSV parse, cleaning, the
+games-table bulk load and the TF-IDF fit. Peak memory is that process'
+VmHWM (peak RSS), including the interpreter and imported libraries.
+
+Usage: python benchmarks/bench_catalogue_load.py [--games 10000 100000 1000000]
+"""
+import argparse
+import multiprocessing as mp
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catalogue import games_table_writer, iter_documents, read_catalogue  # noqa: E402
+from recommender import TFIDF_SETTINGS  # noqa: E402
+from synthetic import make_catalogue  # noqa: E402
+
+
+def _peak_rss_mib():
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmHWM:'):
+                return int(line.split()[1]) / 1024
+    return float('nan')
+
+
+def _whole_file(csv_path, db_path):
+    """The previous pipeline: default dtypes, a second full read for the games table"""
+    conn = sqlite3.connect(db_path)
+    pd.read_csv(csv_path).to_sql('games', conn, if_exists='replace', index=False)
+    conn.commit()
+
+    df = pd.read_csv(csv_path)
+    for col in ['Description', 'Primary Genre', 'Genres', 'Developer']:
+        df[col] = df[col].fillna('').astype(str)
+    for col in ['Average User Rating', 'User Rating Count']:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+    df['combined_features'] = (
+        df['Primary Genre'] + ' ' + df['Genres'] + ' ' +
+        df['Description'].str[:500] + ' ' + df['Developer']
+    )
+    TfidfVectorizer(**TFIDF_SETTINGS, dtype=np.float32).fit_transform(df['combined_features'])
+    return len(df)
+
+
+def _chunked(csv_path, db_path):
+    conn = sqlite3.connect(db_path)
+    df = read_catalogue(csv_path, on_chunk=games_table_writer(conn))
+    conn.commit()
+    TfidfVectorizer(**TFIDF_SETTINGS, dtype=np.float32).fit_transform(iter_documents(df))
+    return len(df)
+
+
+PIPELINES = {'whole-file': _whole_file, 'chunked': _chunked}
+
+
+def _run(name, csv_path, db_path, results):
+    start = time.perf_counter()
+    PIPELINES[name](csv_path, db_path)
+    results.put((time.perf_counter() - start, _peak_rss_mib()))
+
+
+def measure(name, csv_path, tmp):
+    db_path = os.path.join(tmp, f'{name}.db')
+    ctx = mp.get_context('spawn')
+    results = ctx.Queue()
+    proc = ctx.Process(target=_run, args=(name, csv_path, db_path, results))
+    proc.start()
+    seconds, peak = results.get()
+    proc.join()
+    os.remove(db_path)
+    return seconds, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--games', type=int, nargs='+', default=[10000, 100000, 1000000])
+    args = parser.parse_args()
+
+    print(f"{'games':>8} {'pipeline':<11} {'load s':>7} {'peak MiB':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_games in args.games:
+            csv_path = os.path.join(tmp, 'games.csv')
+            make_catalogue(n_games).to_csv(csv_path, index=False)
+            for name in PIPELINES:
+                seconds, peak = measure(name, csv_path, tmp)
+                print(f"{n_games:>8} {name:<11} {seconds:>7.2f} {peak:>9.0f}")
+            os.remove(csv_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+"""ALS training time against the number of interactions.
+
+Usage: python benchmarks/bench_cf_training.py [--ratings 10000 100000 1000000]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from collaborative import ALSModel  # noqa: E402
+from synthetic import make_ratings  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--ratings', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--games', type=int, default=20000)
+    parser.add_argument('--ratings-per-user', type=int, default=20)
+    parser.add_argument('--factors', type=int, default=32)
+    parser.add_argument('--iterations', type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{args.games} games, {args.factors} factors, {args.iterations} iterations")
+    print(f"{'ratings':>9} {'users':>7} {'train s':>8} {'s/iter':>7} {'score ms':>9}")
+    for n_ratings in args.ratings:
+        n_users = max(1, n_ratings // args.ratings_per_user)
+        user_ids, game_urls, ratings = make_ratings(n_ratings, n_users, args.games)
+
+        model = ALSModel(args.factors, iterations=args.iterations)
+        start = time.perf_counter()
+        model.fit(user_ids, game_urls, ratings)
+        elapsed = time.perf_counter() - start
+
+        # One user's scores over every item: a single matrix-vector product
+        start = time.perf_counter()
+        for user_id in model.user_ids[:100]:
+            model.score_user(user_id)
+        score_ms = (time.perf_counter() - start) / min(100, len(model.user_ids)) * 1000
+
+        print(f"{n_ratings:>9} {n_users:>7} {elapsed:>8.2f} "
+              f"{elapsed / args.iterations:>7.3f} {score_ms:>9.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""Requests/sec of the app's SQLite workload: connect-per-request vs the pool.
+
+Each simulated request mirrors the app's routes: a login-style user lookup,
+a rating read like get_recommendations, and a view insert with commit like
+game_detail. Threads run requests concurrently against one database file.
+
+Usage: python benchmarks/bench_db.py [--threads 8] [--requests 500]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db  # noqa: E402
+
+SCHEMA = (
+    '''CREATE TABLE users (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                           username TEXT UNIQUE, password TEXT)''',
+    '''CREATE TABLE interactions (user_id INTEGER, game_url TEXT,
+                                  interaction_type TEXT, value REAL,
+                                  timestamp DATETIME DEFAULT CURRENT_TIMESTAMP)'''
+)
+
+
+def _seed(path, n_users=200, n_ratings=5000):
+    conn = sqlite3.connect(path)
+    for statement in SCHEMA:
+        conn.execute(statement)
+    conn.executemany("INSERT INTO users (username, password) VALUES (?, 'x')",
+                     [(f'user{i}',) for i in range(n_users)])
+    rng = random.Random(0)
+    conn.executemany(
+        "INSERT INTO interactions (user_id, game_url, interaction_type, value) "
+        "VALUES (?, ?, 'rating', ?)",
+        [(rng.randint(1, n_users), f'game{rng.randint(0, 10000)}', rng.randint(1, 5))
+         for _ in range(n_ratings)]
+    )
+    conn.commit()
+    conn.close()
+
+
+def _request(conn, rng):
+    user_id = rng.randint(1, 200)
+    conn.execute("SELECT id, password FROM users WHERE username = ?", (f'user{user_id}',)).fetchone()
+    conn.execute('''SELECT game_url, value FROM interactions
+                    WHERE user_id = ? AND interaction_type = 'rating'
+                    ORDER BY timestamp DESC''', (user_id,)).fetchall()
+    conn.execute("INSERT INTO interactions (user_id, game_url, interaction_type) VALUES (?, ?, 'view')",
+                 (user_id, f'game{rng.randint(0, 10000)}'))
+    conn.commit()
+
+
+def run(mode, path, threads, requests):
+    pool = db.ConnectionPool(path, max_idle=threads)
+    errors = []
+
+    def worker(seed):
+        rng = random.Random(seed)
+        try:
+            for _ in range(requests):
+                if mode == 'pool':
+                    with pool.connection() as conn:
+                        _request(conn, rng)
+                else:
+                    conn = sqlite3.connect(path, timeout=30)
+                    try:
+                        _request(conn, rng)
+                    finally:
+                        conn.close()
+        except sqlite3.Error as e:
+            errors.append(e)
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - start
+    pool.close_all()
+    return threads * requests / elapsed, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=500, help='requests per thread')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ('connect', 'pool'):
+            path = os.path.join(tmp, f'{mode}.db')
+            _seed(path)
+            rps, errors = run(mode, path, args.threads, args.requests)
+            print(f"{mode:<8} {rps:>9.0f} req/s  ({len(errors)} errors)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""Index build time against the number of worker processes.
+
+Times the TF-IDF fit and the neighbour search separately for each --jobs
+value and checks that every parallel build matches the serial one.
+
+Usage: python benchmarks/bench_parallel_build.py [--games 50000] [--jobs 1 2 4 8]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catalogue import clean_chunk, compact, fit_tfidf  # noqa: E402
+from neighbors import ENGINES  # noqa: E402
+from recommender import TFIDF_SETTINGS  # noqa: E402
+from synthetic import make_catalogue  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--games', type=int, default=50000)
+    parser.add_argument('--top-k', type=int, default=50)
+    parser.add_argument('--engine', choices=sorted(ENGINES), default='exact')
+    parser.add_argument('--jobs', type=int, nargs='+', default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    df = compact(clean_chunk(make_catalogue(args.games)))
+    print(f"{args.games} games, {args.engine} engine, top_k={args.top_k}, {os.cpu_count()} CPUs")
+    print(f"{'jobs':>4} {'tfidf s':>8} {'search s':>9} {'total s':>8} {'speedup':>8} {'same':>5}")
+
+    baseline = None
+    for n_jobs in args.jobs:
+        start = time.perf_counter()
+        _, tfidf_matrix = fit_tfidf(df, TFIDF_SETTINGS, n_jobs)
+        fit_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        graph = ENGINES[args.engine](args.top_k, n_jobs=n_jobs).build(tfidf_matrix)
+        search_time = time.perf_counter() - start
+
+        total = fit_time + search_time
+        if baseline is None:
+            baseline = (total, tfidf_matrix, graph)
+        same = (tfidf_matrix != baseline[1]).nnz == 0 and (graph != baseline[2]).nnz == 0
+        print(f"{n_jobs:>4} {fit_time:>8.2f} {search_time:>9.2f} {total:>8.2f} "
+              f"{baseline[0] / total:>7.2f}x {str(same):>5}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""Recall and build time of the approximate neighbour engine against exact search.
+
+Recall@K is the fraction of each game's exact top-K neighbours that the
+approximate engine also returns, averaged over games that have any
+neighbours at all.
+
+Usage: python benchmarks/eval_ann_recall.py [--games 20000] [--probes 2 4 8 16]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catalogue import fit_tfidf, read_catalogue  # noqa: E402
+from neighbors import ExactNeighbors, IVFNeighbors  # noqa: E402
+from recommender import TFIDF_SETTINGS  # noqa: E402
+from synthetic import write_catalogue  # noqa: E402
+
+
+def recall_at_k(exact, approx):
+    hits, total = 0, 0
+    for row in range(exact.shape[0]):
+        truth = exact.indices[exact.indptr[row]:exact.indptr[row + 1]]
+        if len(truth) == 0:
+            continue
+        found = approx.indices[approx.indptr[row]:approx.indptr[row + 1]]
+        hits += len(np.intersect1d(truth, found, assume_unique=True))
+        total += len(truth)
+    return hits / total if total else 1.0
+
+
+def timed_build(engine, tfidf_matrix):
+    start = time.perf_counter()
+    graph = engine.build(tfidf_matrix)
+    return graph, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--data', default=None, help='CSV to load (default: synthetic)')
+    parser.add_argument('--games', type=int, default=20000)
+    parser.add_argument('--top-k', type=int, default=50)
+    parser.add_argument('--components', type=int, default=128)
+    parser.add_argument('--lists', type=int, default=None)
+    parser.add_argument('--probes', type=int, nargs='+', default=[2, 4, 8, 16])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_path = args.data or write_catalogue(os.path.join(tmp, 'games.csv'), args.games)
+        # Only the TF-IDF rows are needed, so skip GameRecommender and its index build
+        games_df = read_catalogue(data_path).drop_duplicates(subset=['URL']).reset_index(drop=True)
+    _, tfidf_matrix = fit_tfidf(games_df, TFIDF_SETTINGS)
+
+    exact, exact_time = timed_build(ExactNeighbors(args.top_k), tfidf_matrix)
+    print(f"{tfidf_matrix.shape[0]} games, top_k={args.top_k}")
+    print(f"{'engine':<18} {'build s':>8} {'recall':>7}")
+    print(f"{'exact':<18} {exact_time:>8.2f} {1.0:>7.3f}")
+
+    for n_probe in args.probes:
+        engine = IVFNeighbors(
+            args.top_k, n_components=args.components, n_lists=args.lists, n_probe=n_probe
+        )
+        approx, approx_time = timed_build(engine, tfidf_matrix)
+        label = f"ivf n_probe={n_probe}"
+        print(f"{label:<18} {approx_time:>8.2f} {recall_at_k(exact, approx):>7.3f}")
+
+
+if __name__ == '__main__':
+    main()
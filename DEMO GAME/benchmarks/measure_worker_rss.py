@@ -0,0 +1,95 @@
+"""Compare per-worker memory with private vs memory-mapped recommender indexes.
+
+Starts N worker processes that each load a GameRecommender from the same
+artifact, touch every page of the similarity and TF-IDF arrays, then report
+RSS and PSS while all workers are alive. PSS splits shared pages between the
+processes mapping them, so it shows what each worker really costs.
+
+Usage: python benchmarks/measure_worker_rss.py [--games 50000] [--workers 4]
+"""
+import argparse
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from recommender import GameRecommender  # noqa: E402
+from synthetic import write_catalogue  # noqa: E402
+
+
+def _memory_kb():
+    """VmRSS/RssAnon/RssFile from /proc/self/status and Pss from smaps_rollup"""
+    stats = {}
+    with open('/proc/self/status') as f:
+        for line in f:
+            key, _, value = line.partition(':')
+            if key in ('VmRSS', 'RssAnon', 'RssFile'):
+                stats[key] = int(value.split()[0])
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            if line.startswith('Pss:'):
+                stats['Pss'] = int(line.split()[1])
+    return stats
+
+
+def _worker(data_path, cache_dir, top_k, mmap, ready, done, results):
+    recommender = GameRecommender(data_path, top_k=top_k, cache_dir=cache_dir, mmap=mmap)
+    # Touch every page so the measurement reflects a warmed-up worker
+    for matrix in (recommender.similarity_index, recommender.tfidf_matrix):
+        float(matrix.data.sum())
+        int(matrix.indices.sum())
+    float(recommender.avg_rating.sum() + recommender.rating_count.sum())
+    results.put(None)
+    ready.wait()
+    results.put(_memory_kb())
+    done.wait()
+
+
+def measure(data_path, cache_dir, top_k, workers, mmap):
+    ctx = mp.get_context('spawn')
+    ready, done, results = ctx.Event(), ctx.Event(), ctx.Queue()
+    procs = [
+        ctx.Process(target=_worker, args=(data_path, cache_dir, top_k, mmap, ready, done, results))
+        for _ in range(workers)
+    ]
+    for p in procs:
+        p.start()
+
+    # Sample only once every worker has loaded, so shared pages are counted fairly
+    for _ in procs:
+        results.get()
+    ready.set()
+    samples = [results.get() for _ in procs]
+    done.set()
+    for p in procs:
+        p.join()
+
+    return {key: sum(s[key] for s in samples) / len(samples) for key in samples[0]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--data', default=None, help='CSV to load (default: synthetic)')
+    parser.add_argument('--games', type=int, default=50000)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--top-k', type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_path = args.data or write_catalogue(os.path.join(tmp, 'games.csv'), args.games)
+        cache_dir = os.path.join(tmp, 'cache')
+        GameRecommender(data_path, top_k=args.top_k, cache_dir=cache_dir).save_artifact()
+
+        print(f"{args.workers} workers, per-worker averages in MiB")
+        print(f"{'mode':<10} {'VmRSS':>8} {'RssAnon':>8} {'RssFile':>8} {'Pss':>8}")
+        for label, mmap in (('private', False), ('mmap', True)):
+            stats = measure(data_path, cache_dir, args.top_k, args.workers, mmap)
+            print(f"{label:<10} " + ' '.join(
+                f"{stats[key] / 1024:>8.1f}" for key in ('VmRSS', 'RssAnon', 'RssFile', 'Pss')
+            ))
+
+
+if __name__ == '__main__':
+    main()
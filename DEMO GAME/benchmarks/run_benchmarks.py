@@ -0,0 +1,318 @@
+"""Reproducible benchmark suite for the recommender and the Flask routes.
+
+Builds a synthetic catalogue and rating histories in a scratch directory,
+then measures:
+  - GameRecommender construction time and peak RSS, cold and from the artifact
+  - get_recommendations p50/p99 latency by number of user ratings, uncached,
+    and with a Genres tag filter
+  - get_popular_games latency, unfiltered and by facet
+  - index / game_detail / rate_game throughput through the Flask test client
+
+Results are written as JSON; pass --compare with an earlier file to print
+the change of every metric between the two runs.
+
+Usage: python benchmarks/run_benchmarks.py [--games 20000] [--ratings 1 10 100 1000]
+                                           [--output results.json] [--compare old.json]
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, APP_DIR)
+
+import db  # noqa: E402
+from recommender import GameRecommender  # noqa: E402
+from synthetic import write_catalogue  # noqa: E402
+
+DATA_PATH = os.path.join('data', 'Game_processed_data.csv')
+DB_PATH = os.path.join('data', 'recommendations.db')
+BENCH_PASSWORD = 'benchmark'
+
+SCHEMA = (
+    '''CREATE TABLE IF NOT EXISTS users
+       (id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT UNIQUE, password TEXT)''',
+    '''CREATE TABLE IF NOT EXISTS interactions
+       (user_id INTEGER, game_url TEXT, interaction_type TEXT, value REAL,
+        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY(user_id) REFERENCES users(id))''',
+)
+
+
+def _peak_rss_mib():
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmHWM:'):
+                return int(line.split()[1]) / 1024
+    return None
+
+
+def _summary(samples_ms):
+    samples = np.asarray(samples_ms)
+    return {
+        'n': len(samples),
+        'mean_ms': float(samples.mean()),
+        'p50_ms': float(np.percentile(samples, 50)),
+        'p99_ms': float(np.percentile(samples, 99))
+    }
+
+
+def _construct(workdir, save, results):
+    os.chdir(workdir)
+    start = time.perf_counter()
+    recommender = GameRecommender(DATA_PATH)
+    elapsed = time.perf_counter() - start
+    results.put({'seconds': elapsed, 'peak_rss_mib': _peak_rss_mib()})
+    if save:
+        # What build_index.py does, so the next process starts warm
+        recommender.save_artifact()
+
+
+def bench_construction(workdir):
+    """Cold build in a fresh process, then a second one that loads the artifact"""
+    ctx = mp.get_context('spawn')
+    results = {}
+    for label in ('cold', 'warm'):
+        queue = ctx.Queue()
+        proc = ctx.Process(target=_construct, args=(workdir, label == 'cold', queue))
+        proc.start()
+        results[label] = queue.get()
+        proc.join()
+    return results
+
+
+def seed_database(urls, rating_counts, users_per_bucket, seed=0):
+    """Users with exactly n ratings for each n in rating_counts; returns {n: [user ids]}"""
+    from werkzeug.security import generate_password_hash
+
+    conn = sqlite3.connect(DB_PATH)
+    for statement in SCHEMA:
+        conn.execute(statement)
+    conn.commit()
+    db.migrate(conn)
+
+    rng = random.Random(seed)
+    password = generate_password_hash(BENCH_PASSWORD)
+    buckets = {}
+    for n_ratings in rating_counts:
+        buckets[n_ratings] = []
+        for i in range(users_per_bucket):
+            cursor = conn.execute("INSERT INTO users (username, password) VALUES (?, ?)",
+                                  (f'bench_{n_ratings}_{i}', password))
+            user_id = cursor.lastrowid
+            buckets[n_ratings].append(user_id)
+            conn.executemany(
+                "INSERT INTO interactions (user_id, game_url, interaction_type, value) "
+                "VALUES (?, ?, 'rating', ?)",
+                [(user_id, url, rng.randint(1, 5))
+                 for url in rng.sample(urls, min(n_ratings, len(urls)))]
+            )
+    conn.commit()
+    conn.close()
+    return buckets
+
+
+def bench_recommendations(recommender, buckets, samples):
+    """Uncached get_recommendations latency, grouped by the user's rating count"""
+    results = {}
+    for n_ratings, user_ids in buckets.items():
+        timings = []
+        for i in range(samples):
+            user_id = user_ids[i % len(user_ids)]
+            recommender.invalidate_user(user_id)
+            start = time.perf_counter()
+            recommender.get_recommendations(user_id, top_n=10)
+            timings.append((time.perf_counter() - start) * 1000)
+        results[str(n_ratings)] = _summary(timings)
+
+    # Filtered calls always bypass the cache
+    tag = next(iter(recommender.tag_masks), None)
+    user_ids = buckets[max(buckets)]
+    timings = []
+    for i in range(samples):
+        start = time.perf_counter()
+        recommender.get_recommendations(user_ids[i % len(user_ids)], top_n=10, tag=tag)
+        timings.append((time.perf_counter() - start) * 1000)
+    results['tag_filtered'] = _summary(timings)
+
+    user_id = next(iter(buckets.values()))[0]
+    recommender.get_recommendations(user_id, top_n=10)
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        recommender.get_recommendations(user_id, top_n=10)
+        timings.append((time.perf_counter() - start) * 1000)
+    results['cached'] = _summary(timings)
+    return results
+
+
+def bench_popular(recommender, samples):
+    genre = next(iter(recommender.popular_by_genre), None)
+    tag = next(iter(recommender.tag_masks), None)
+    developer = next(iter(recommender.developer_rows), None)
+    cases = {
+        'top10': lambda: recommender.get_popular_games(10),
+        'top200': lambda: recommender.get_popular_games(200),
+        'genre_top10': lambda: recommender.get_popular_games(10, genre=genre),
+        'tag_top10': lambda: recommender.get_popular_games(10, tag=tag),
+        'developer_top10': lambda: recommender.get_popular_games(10, developer=developer)
+    }
+    results = {}
+    for name, call in cases.items():
+        timings = []
+        for _ in range(samples):
+            start = time.perf_counter()
+            call()
+            timings.append((time.perf_counter() - start) * 1000)
+        results[name] = _summary(timings)
+    return results
+
+
+def bench_routes(buckets, requests, seed=0):
+    """Requests/sec and latency of the main routes via the Flask test client"""
+    import app as app_module
+
+    client = app_module.app.test_client()
+    n_ratings = sorted(buckets)[len(buckets) // 2]
+    username = f'bench_{n_ratings}_0'
+    client.post('/login', data={'username': username, 'password': BENCH_PASSWORD})
+    with client.session_transaction() as session:
+        if 'user_id' not in session:
+            raise RuntimeError(f"Could not log in as {username}")
+
+    rng = random.Random(seed)
+    names = app_module.recommender.games_df['Name'].astype(str).tolist()
+    # (call, expected status); rate_game redirects back to the game page
+    routes = {
+        'index': (lambda: client.get('/'), 200),
+        'game_detail': (lambda: client.get(f'/game/{rng.choice(names)}'), 200),
+        'rate_game': (lambda: client.post(f'/rate/{rng.choice(names)}',
+                                          data={'rating': str(rng.randint(1, 5))}), 302)
+    }
+    results = {}
+    for name, (call, expected) in routes.items():
+        timings = []
+        start_all = time.perf_counter()
+        for _ in range(requests):
+            start = time.perf_counter()
+            response = call()
+            timings.append((time.perf_counter() - start) * 1000)
+            if response.status_code != expected:
+                raise RuntimeError(f"{name} returned {response.status_code}")
+        results[name] = dict(_summary(timings), req_per_s=requests / (time.perf_counter() - start_all))
+
+    app_module.interaction_writer.close()
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=APP_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _flatten(tree, prefix=''):
+    flat = {}
+    for key, value in tree.items():
+        name = f'{prefix}{key}'
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f'{name}.'))
+        elif key != 'n' and isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare(baseline_path, results):
+    """Print every shared metric with its relative change against the baseline"""
+    with open(baseline_path) as f:
+        baseline = _flatten(json.load(f)['results'])
+    current = _flatten(results)
+    print(f"{'metric':<46} {'baseline':>10} {'current':>10} {'change':>8}")
+    for name in sorted(baseline.keys() & current.keys()):
+        old, new = baseline[name], current[name]
+        change = f"{(new - old) / old:+.1%}" if old else 'n/a'
+        print(f"{name:<46} {old:>10.3f} {new:>10.3f} {change:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--games', type=int, default=20000)
+    parser.add_argument('--ratings', type=int, nargs='+', default=[1, 10, 100, 1000],
+                        help='rating-history sizes to measure latency for')
+    parser.add_argument('--users-per-bucket', type=int, default=20)
+    parser.add_argument('--samples', type=int, default=200, help='calls per latency measurement')
+    parser.add_argument('--requests', type=int, default=200, help='requests per route')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workdir', default=None, help='scratch directory (default: temporary)')
+    parser.add_argument('--output', default=None, help='JSON results file')
+    parser.add_argument('--compare', default=None, help='earlier JSON results to diff against')
+    args = parser.parse_args()
+
+    output = os.path.abspath(args.output) if args.output else None
+    baseline = os.path.abspath(args.compare) if args.compare else None
+    workdir = args.workdir or tempfile.mkdtemp(prefix='recommender-bench-')
+    os.makedirs(os.path.join(workdir, 'data'), exist_ok=True)
+    os.chdir(workdir)
+    write_catalogue(DATA_PATH, args.games, seed=args.seed)
+    db.configure(DB_PATH)
+
+    results = {}
+    print("Construction...")
+    results['construction'] = bench_construction(workdir)
+
+    recommender = GameRecommender(DATA_PATH)
+    buckets = seed_database(
+        recommender.games_df['URL'].tolist(), args.ratings, args.users_per_bucket, args.seed
+    )
+    print("get_recommendations latency...")
+    results['get_recommendations'] = bench_recommendations(recommender, buckets, args.samples)
+    print("get_popular_games latency...")
+    results['get_popular_games'] = bench_popular(recommender, args.samples)
+    print("Flask routes...")
+    results['routes'] = bench_routes(buckets, args.requests, args.seed)
+
+    report = {
+        'meta': {
+            'commit': _git_commit(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'args': {key: value for key, value in vars(args).items()
+                     if key not in ('output', 'compare', 'workdir')}
+        },
+        'results': results
+    }
+    output = output or os.path.join(
+        BENCH_DIR, 'results', f"{(report['meta']['commit'] or 'local')[:12]}.json"
+    )
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(results, indent=2))
+    print(f"Results written to {output}")
+
+    if baseline:
+        compare(baseline, results)
+    if not args.workdir:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""Synthetic game catalogues shaped like Game_processed_data.csv"""
+import numpy as np
+import pandas as pd
+
+GENRES = [
+    'Games', 'Strategy', 'Puzzle', 'Action', 'Simulation', 'Board',
+    'Entertainment', 'Family', 'Role Playing', 'Casual', 'Adventure', 'Sports'
+]
+
+# Descriptions mix words from one topic with a shared background vocabulary,
+# which gives the TF-IDF neighbourhoods structure similar to real listings
+N_TOPICS = 60
+TOPIC_WORDS = 40
+BACKGROUND_WORDS = 400
+
+
+def _vocabulary(rng):
+    syllables = ['ka', 'ro', 'mi', 'zu', 'te', 'la', 'vo', 'ni', 'shi', 'pa', 'do', 'ge']
+    words = set()
+    while len(words) < N_TOPICS * TOPIC_WORDS + BACKGROUND_WORDS:
+        words.add(''.join(rng.choice(syllables, rng.integers(2, 5))))
+    words = sorted(words)
+    rng.shuffle(words)
+    topics = np.array(words[:N_TOPICS * TOPIC_WORDS]).reshape(N_TOPICS, TOPIC_WORDS)
+    return topics, np.array(words[N_TOPICS * TOPIC_WORDS:])
+
+
+def make_catalogue(n_games, seed=0, description_words=40, topic_share=0.7):
+    """Return a DataFrame with the columns GameRecommender requires"""
+    rng = np.random.default_rng(seed)
+    idx = np.arange(n_games)
+    topics, background = _vocabulary(rng)
+
+    topic = rng.integers(0, N_TOPICS, n_games)
+    primary = np.array(GENRES[1:])[topic % (len(GENRES) - 1)]
+    extra = rng.choice(GENRES[1:], (n_games, 2))
+    genres = [
+        ', '.join(dict.fromkeys(['Games', p, *e]))
+        for p, e in zip(primary, extra)
+    ]
+    n_topic = int(description_words * topic_share)
+    topic_part = topics[topic[:, None], rng.integers(0, TOPIC_WORDS, (n_games, n_topic))]
+    background_part = rng.choice(background, (n_games, description_words - n_topic))
+    descriptions = [
+        ' '.join(words)
+        for words in np.concatenate([topic_part, background_part], axis=1)
+    ]
+    ratings = rng.choice([np.nan, 1.0, 2.0, 3.0, 3.5, 4.0, 4.5, 5.0], n_games)
+
+    return pd.DataFrame({
+        'URL': [f'https://apps.example.com/app/id{i}' for i in idx],
+        'ID': idx,
+        'Name': [f'Game {i}' for i in idx],
+        'Icon URL': [f'https://apps.example.com/icon/{i}.png' for i in idx],
+        'Average User Rating': ratings,
+        'User Rating Count': rng.integers(0, 5000, n_games).astype(float),
+        'Description': descriptions,
+        'Developer': [f'Studio {d}' for d in rng.integers(0, max(1, n_games // 20), n_games)],
+        'Primary Genre': primary,
+        'Genres': genres
+    })
+
+
+def write_catalogue(path, n_games, seed=0):
+    make_catalogue(n_games, seed).to_csv(path, index=False)
+    return path
+
+
+def make_ratings(n_ratings, n_users, n_games, seed=0, n_tastes=8):
+    """(user_ids, game_urls, ratings) with low-rank structure, like real rating logs.
+
+    Game popularity is Zipf-shaped, and each rating is the user/game taste
+    affinity quantised to 1..5 stars. (user, game) pairs may repeat.
+    """
+    rng = np.random.default_rng(seed)
+    user_taste = rng.standard_normal((n_users, n_tastes))
+    game_taste = rng.standard_normal((n_games, n_tastes))
+
+    popularity = 1 / np.arange(1, n_games + 1)
+    users = rng.integers(0, n_users, n_ratings)
+    games = rng.choice(n_games, n_ratings, p=popularity / popularity.sum())
+    affinity = np.einsum('ij,ij->i', user_taste[users], game_taste[games]) / np.sqrt(n_tastes)
+    ratings = np.clip(np.round(3 + 1.5 * affinity + rng.normal(0, 0.5, n_ratings)), 1, 5)
+
+    urls = np.array([f'https://apps.example.com/app/id{i}' for i in range(n_games)])
+    return users.tolist(), urls[games].tolist(), ratings.tolist()
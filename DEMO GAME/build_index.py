@@ -0,0 +1,46 @@
+"""Build the recommender artifact offline so app workers start without refitting.
+
+Usage: python build_index.py [--data data/Game_processed_data.csv] [--top-k 50]
+                              [--engine exact|ivf] [--n-probe 8] [--jobs N]
+"""
+import argparse
+import os
+import time
+
+from neighbors import ENGINES
+from recommender import DEFAULT_TOP_K, GameRecommender
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--data', default='data/Game_processed_data.csv')
+    parser.add_argument('--cache-dir', default=None)
+    parser.add_argument('--max-games', type=int, default=None)
+    parser.add_argument('--top-k', type=int, default=DEFAULT_TOP_K)
+    parser.add_argument('--engine', choices=sorted(ENGINES), default='exact')
+    parser.add_argument('--n-probe', type=int, default=None, help='ivf engine only')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count(),
+                        help='processes for tokenising and neighbour search')
+    args = parser.parse_args()
+
+    engine_options = {}
+    if args.n_probe is not None:
+        engine_options['n_probe'] = args.n_probe
+
+    start = time.perf_counter()
+    recommender = GameRecommender(
+        args.data,
+        max_games=args.max_games,
+        top_k=args.top_k,
+        cache_dir=args.cache_dir,
+        engine=args.engine,
+        engine_options=engine_options,
+        n_jobs=args.jobs
+    )
+    path = recommender.save_artifact()
+    print(f"Artifact for {len(recommender.games_df)} games written to {path} "
+          f"in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,196 @@
+"""Chunked loading of the game catalogue CSV with compact dtypes"""
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix
+from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
+from sklearn.preprocessing import normalize
+
+REQUIRED_COLUMNS = {
+    'URL', 'Name', 'Icon URL', 'Average User Rating',
+    'User Rating Count', 'Description', 'Developer',
+    'Primary Genre', 'Genres'
+}
+
+# Read when present; the app store ID backs /api/games/<id>
+OPTIONAL_COLUMNS = {'ID'}
+
+TEXT_COLUMNS = ['Description', 'Primary Genre', 'Genres', 'Developer']
+
+# Few distinct values across many rows, so codes beat repeated strings
+CATEGORICAL_COLUMNS = ['Primary Genre', 'Developer']
+
+# Rows parsed per read_csv chunk
+CHUNK_ROWS = 50000
+
+# Description prefix that feeds the TF-IDF document
+DESCRIPTION_CHARS = 500
+
+
+def clean_chunk(df):
+    """Normalise text and numeric columns in place"""
+    for col in TEXT_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].fillna('').astype(str)
+
+    df['Average User Rating'] = pd.to_numeric(
+        df['Average User Rating'], errors='coerce'
+    ).astype('float32')
+    # Missing counts mean nobody rated the game
+    df['User Rating Count'] = pd.to_numeric(
+        df['User Rating Count'], errors='coerce'
+    ).fillna(0).astype('int32')
+    if 'ID' in df.columns:
+        df['ID'] = pd.to_numeric(df['ID'], errors='coerce').astype('Int64')
+    return df
+
+
+def compact(df):
+    """Convert low-cardinality text columns to categoricals"""
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+    return df
+
+
+def read_catalogue(path, max_games=None, chunksize=CHUNK_ROWS, on_chunk=None):
+    """Read the catalogue CSV chunk by chunk, keeping only the columns in use.
+
+    on_chunk, if given, receives each raw chunk before the next is parsed,
+    e.g. to bulk-load the games table in the same pass. Raw chunks have every
+    CSV column, uncleaned, so missing values stay missing; only then are the
+    columns pruned and cleaned for the recommender.
+    """
+    def in_use(column):
+        return column in REQUIRED_COLUMNS or column in OPTIONAL_COLUMNS
+
+    reader = pd.read_csv(
+        path,
+        usecols=None if on_chunk is not None else in_use,
+        dtype={column: str for column in REQUIRED_COLUMNS - {'Average User Rating', 'User Rating Count'}},
+        nrows=max_games,
+        chunksize=chunksize
+    )
+    chunks = []
+    for chunk in reader:
+        missing_cols = REQUIRED_COLUMNS - set(chunk.columns)
+        if missing_cols:
+            raise ValueError(f"Missing columns: {missing_cols}")
+        if on_chunk is not None:
+            on_chunk(chunk)
+            chunk = chunk[[column for column in chunk.columns if in_use(column)]].copy()
+        clean_chunk(chunk)
+        chunks.append(chunk)
+
+    if not chunks:
+        return pd.DataFrame(columns=sorted(REQUIRED_COLUMNS))
+    # Categories are assigned after the concat so every chunk shares one set
+    return compact(pd.concat(chunks, ignore_index=True))
+
+
+def combined_features(df):
+    """TF-IDF documents for the rows of df"""
+    return (
+        df['Primary Genre'].astype(str) + ' ' +
+        df['Genres'] + ' ' +
+        df['Description'].str[:DESCRIPTION_CHARS] + ' ' +
+        df['Developer'].astype(str)
+    )
+
+
+def iter_documents(df, chunksize=CHUNK_ROWS):
+    """Yield documents chunk by chunk, so the full corpus is never materialised"""
+    for start in range(0, len(df), chunksize):
+        yield from combined_features(df.iloc[start:start + chunksize])
+
+
+def _count_terms(documents, settings):
+    """Term counts of one chunk against the chunk's own sorted vocabulary"""
+    counter = CountVectorizer(
+        stop_words=settings.get('stop_words'), ngram_range=settings.get('ngram_range', (1, 1)),
+        dtype=np.int64
+    )
+    try:
+        counts = counter.fit_transform(documents)
+    except ValueError:
+        # Nothing but stop words in this chunk
+        return csr_matrix((len(documents), 0), dtype=np.int64), np.empty(0, dtype=object)
+    return counts, counter.get_feature_names_out()
+
+
+def fit_tfidf(df, settings, n_jobs=1):
+    """Fit a TfidfVectorizer on df's documents, tokenising chunks in parallel.
+
+    Each worker counts terms for its chunk; the counts are merged into the
+    vocabulary and IDF weights a single fit_transform over all documents
+    would produce. Returns (vectorizer, float32 TF-IDF matrix). The parallel
+    path honours stop_words, ngram_range and max_features from settings.
+    """
+    if n_jobs <= 1:
+        vectorizer = TfidfVectorizer(**settings, dtype=np.float32)
+        return vectorizer, vectorizer.fit_transform(iter_documents(df))
+
+    chunksize = min(CHUNK_ROWS, max(1000, -(-len(df) // (n_jobs * 4))))
+    with ProcessPoolExecutor(n_jobs) as executor:
+        futures = [
+            executor.submit(_count_terms, combined_features(df.iloc[start:start + chunksize]).tolist(), settings)
+            for start in range(0, len(df), chunksize)
+        ]
+        chunks = [future.result() for future in futures]
+
+    # Columns of every chunk mapped into the sorted union vocabulary
+    terms = np.unique(np.concatenate([chunk_terms for _, chunk_terms in chunks]).astype(str))
+    column_maps = [np.searchsorted(terms, chunk_terms.astype(str)) for _, chunk_terms in chunks]
+    term_freq = np.zeros(len(terms), dtype=np.int64)
+    doc_freq = np.zeros(len(terms), dtype=np.int64)
+    for (counts, _), columns in zip(chunks, column_maps):
+        term_freq += np.bincount(columns[counts.indices], weights=counts.data, minlength=len(terms)).astype(np.int64)
+        doc_freq += np.bincount(columns[counts.indices], minlength=len(terms))
+
+    # Same selection as CountVectorizer's max_features: most frequent terms, kept in sorted order
+    kept = np.arange(len(terms))
+    max_features = settings.get('max_features')
+    if max_features is not None and len(terms) > max_features:
+        kept = np.sort((-term_freq).argsort()[:max_features])
+    new_column = np.full(len(terms), -1, dtype=np.int64)
+    new_column[kept] = np.arange(len(kept))
+
+    # Smoothed IDF, computed in float32 as TfidfTransformer does for float32 input
+    n_samples = np.float32(len(df) + 1)
+    idf = np.log(n_samples / (doc_freq[kept].astype(np.float32) + 1)) + np.float32(1)
+
+    union_cols = np.concatenate([columns[counts.indices] for (counts, _), columns in zip(chunks, column_maps)])
+    data = np.concatenate([counts.data for counts, _ in chunks])
+    row_lengths = np.concatenate([np.diff(counts.indptr) for counts, _ in chunks])
+    rows = np.repeat(np.arange(len(row_lengths)), row_lengths)
+
+    # CountVectorizer orders a row's entries by when each term was first seen in
+    # the corpus; matching that layout keeps the matrix identical to a serial
+    # fit, down to the summation order of later similarity products
+    _, first_seen = np.unique(union_cols, return_index=True)
+    order = np.lexsort((first_seen[union_cols], rows))
+    cols = new_column[union_cols[order]]
+    keep = cols >= 0
+    indptr = np.concatenate([[0], np.cumsum(np.bincount(rows[order][keep], minlength=len(row_lengths)))])
+    tfidf_matrix = csr_matrix(
+        (data[order][keep].astype(np.float32), cols[keep], indptr),
+        shape=(len(row_lengths), len(kept))
+    )
+    tfidf_matrix.data *= idf[tfidf_matrix.indices]
+    tfidf_matrix = normalize(tfidf_matrix, copy=False)
+
+    vectorizer = TfidfVectorizer(**settings, vocabulary=terms[kept].tolist(), dtype=np.float32)
+    vectorizer.idf_ = idf
+    return vectorizer, tfidf_matrix
+
+
+def games_table_writer(conn, table='games'):
+    """Chunk callback that replaces `table` with the streamed catalogue rows, all CSV columns included"""
+    state = {'first': True}
+
+    def write(chunk):
+        chunk.to_sql(table, conn, if_exists='replace' if state['first'] else 'append', index=False)
+        state['first'] = False
+
+    return write
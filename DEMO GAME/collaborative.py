@@ -0,0 +1,171 @@
+"""Matrix-factorisation collaborative filtering over the interactions table"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix
+
+# Upper bound on per-rating outer products (n_factors^2 floats each) held per chunk
+SOLVE_CHUNK_CELLS = 2 ** 22
+
+
+class ALSModel:
+    """Explicit-feedback ALS: rating - mean ~= user_factors[u] . item_factors[i].
+
+    Factors are C-contiguous float32, so scoring a user is one
+    matrix-vector product over item_factors followed by a top-k selection.
+    """
+
+    def __init__(self, n_factors=32, regularization=0.1, iterations=10, seed=0):
+        self.n_factors = n_factors
+        self.regularization = regularization
+        self.iterations = iterations
+        self.seed = seed
+        self.user_ids = []
+        self.user_index = {}
+        self.item_ids = []
+        self.mean = 0.0
+        self.user_factors = np.zeros((0, n_factors), dtype=np.float32)
+        self.item_factors = np.zeros((0, n_factors), dtype=np.float32)
+
+    def fit(self, user_ids, item_ids, ratings):
+        """Train on parallel sequences of user ids, item ids and rating values"""
+        users = pd.Index(user_ids).unique()
+        items = pd.Index(item_ids).unique()
+        rows = users.get_indexer(user_ids)
+        cols = items.get_indexer(item_ids)
+        values = np.asarray(ratings, dtype=np.float32)
+
+        # Keep the last rating of a repeated (user, item) pair; csr_matrix would sum them
+        last = ~pd.DataFrame({'u': rows, 'i': cols}).duplicated(keep='last').to_numpy()
+        rows, cols, values = rows[last], cols[last], values[last]
+
+        self.mean = float(values.mean()) if len(values) else 0.0
+        by_user = csr_matrix(
+            (values - self.mean, (rows, cols)), shape=(len(users), len(items)), dtype=np.float32
+        )
+        by_item = by_user.T.tocsr()
+
+        rng = np.random.default_rng(self.seed)
+        scale = 1 / np.sqrt(self.n_factors)
+        self.user_factors = (rng.standard_normal((len(users), self.n_factors)) * scale).astype(np.float32)
+        self.item_factors = (rng.standard_normal((len(items), self.n_factors)) * scale).astype(np.float32)
+
+        for _ in range(self.iterations):
+            self.user_factors = self._solve(by_user, self.item_factors)
+            self.item_factors = self._solve(by_item, self.user_factors)
+
+        self.user_ids = users.tolist()
+        self.user_index = {user_id: row for row, user_id in enumerate(self.user_ids)}
+        self.item_ids = items.tolist()
+        return self
+
+    def _solve(self, ratings, fixed):
+        """Regularised least squares for every row of `ratings`, in batched chunks"""
+        n_rows, f = ratings.shape[0], self.n_factors
+        solved = np.zeros((n_rows, f), dtype=np.float32)
+        counts = np.diff(ratings.indptr)
+        eye = np.eye(f, dtype=np.float64)
+
+        # Chunk rows so the stacked outer products stay within the cell budget
+        max_entries = max(1, SOLVE_CHUNK_CELLS // (f * f))
+        start = 0
+        while start < n_rows:
+            stop = np.searchsorted(ratings.indptr, ratings.indptr[start] + max_entries, side='right') - 1
+            stop = min(max(stop, start + 1), n_rows)
+
+            lo, hi = ratings.indptr[start], ratings.indptr[stop]
+            vectors = fixed[ratings.indices[lo:hi]]
+            outer = np.einsum('ni,nj->nij', vectors, vectors).reshape(hi - lo, f * f)
+
+            # Entries are grouped by row, so a 0/1 CSR with the chunk's indptr
+            # sums each row's outer products in one sparse product
+            selector = csr_matrix(
+                (np.ones(hi - lo, dtype=np.float32), np.arange(hi - lo), ratings.indptr[start:stop + 1] - lo),
+                shape=(stop - start, hi - lo)
+            )
+            gram = (selector @ outer).reshape(stop - start, f, f).astype(np.float64)
+            rhs = (ratings[start:stop] @ fixed).astype(np.float64)
+
+            # Weighted-lambda regularisation scales with each row's rating count
+            reg = self.regularization * np.maximum(counts[start:stop], 1)
+            gram += reg[:, None, None] * eye
+            solved[start:stop] = np.linalg.solve(gram, rhs[:, :, None])[:, :, 0]
+            start = stop
+        return solved
+
+    def score_user(self, user_id):
+        """Predicted (mean-centred) scores over item_ids, or None for unknown users"""
+        row = self.user_index.get(user_id)
+        if row is None:
+            return None
+        return self.item_factors @ self.user_factors[row]
+
+    def fold_in(self, item_factors, ratings):
+        """User factor for an unseen user from their rated items' factors and ratings"""
+        vectors = np.asarray(item_factors, dtype=np.float64)
+        values = np.asarray(ratings, dtype=np.float64) - self.mean
+        gram = vectors.T @ vectors
+        gram += self.regularization * max(len(values), 1) * np.eye(self.n_factors)
+        return np.linalg.solve(gram, vectors.T @ values).astype(np.float32)
+
+    def aligned_item_factors(self, game_id_to_idx, n_games):
+        """Item factors re-ordered to catalogue rows; unknown games get zero vectors"""
+        aligned = np.zeros((n_games, self.n_factors), dtype=np.float32)
+        rows = np.fromiter((game_id_to_idx.get(url, -1) for url in self.item_ids),
+                           dtype=np.int64, count=len(self.item_ids))
+        known = rows >= 0
+        aligned[rows[known]] = self.item_factors[known]
+        return aligned
+
+    def save(self, path):
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, 'user_factors.npy'), self.user_factors)
+        np.save(os.path.join(path, 'item_factors.npy'), self.item_factors)
+        with open(os.path.join(path, 'model.json'), 'w') as f:
+            json.dump({
+                'n_factors': self.n_factors,
+                'regularization': self.regularization,
+                'iterations': self.iterations,
+                'seed': self.seed,
+                'mean': self.mean,
+                'user_ids': self.user_ids,
+                'item_ids': self.item_ids
+            }, f)
+        return path
+
+    @classmethod
+    def load(cls, path, mmap_mode='r'):
+        with open(os.path.join(path, 'model.json')) as f:
+            meta = json.load(f)
+        model = cls(meta['n_factors'], meta['regularization'], meta['iterations'], meta['seed'])
+        model.mean = meta['mean']
+        model.user_ids = meta['user_ids']
+        model.user_index = {user_id: row for row, user_id in enumerate(model.user_ids)}
+        model.item_ids = meta['item_ids']
+        model.user_factors = np.load(os.path.join(path, 'user_factors.npy'), mmap_mode=mmap_mode)
+        model.item_factors = np.load(os.path.join(path, 'item_factors.npy'), mmap_mode=mmap_mode)
+        return model
+
+
+def load_ratings(conn):
+    """(user_ids, game_urls, ratings) for every rating in the interactions table"""
+    rows = conn.execute(
+        "SELECT user_id, game_url, value FROM interactions WHERE interaction_type = 'rating'"
+    ).fetchall()
+    if not rows:
+        return [], [], []
+    user_ids, game_urls, ratings = zip(*rows)
+    return list(user_ids), list(game_urls), list(ratings)
+
+
+def load_ratings_csv(path, name_to_url):
+    """(user_ids, game_urls, ratings) from a user_interactions.csv-style file.
+
+    Rows are matched to games by case-insensitive name; unknown names are skipped.
+    """
+    df = pd.read_csv(path)
+    urls = df['Name'].astype(str).str.lower().map(name_to_url)
+    df = df[urls.notna()]
+    return df['user_id'].tolist(), urls[urls.notna()].tolist(), df['rating'].astype(float).tolist()
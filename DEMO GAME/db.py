@@ -0,0 +1,174 @@
+"""SQLite access layer shared by the Flask app and the recommender"""
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+DB_PATH = os.environ.get('RECOMMENDER_DB', 'data/recommendations.db')
+
+# Applied to every new connection; journal_mode=WAL also persists in the file
+PRAGMAS = (
+    'PRAGMA journal_mode=WAL',     # Readers no longer block on view-logging writes
+    'PRAGMA synchronous=NORMAL',   # WAL stays consistent without an fsync per commit
+    'PRAGMA cache_size=-16000',    # ~16 MB page cache per connection
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA busy_timeout=5000'
+)
+
+# Compiled statements kept per connection, keyed by SQL text
+STATEMENT_CACHE_SIZE = 256
+
+# Connections inherited across fork(). SQLite must not use or close them in
+# the child, so they are kept referenced here and never garbage-collected.
+_inherited = []
+
+
+class _PooledConnection(sqlite3.Connection):
+    """Connection that remembers the process that opened it"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pid = os.getpid()
+
+
+class ConnectionPool:
+    """Reuses open connections so requests skip connect and statement compilation.
+
+    Safe across fork (e.g. gunicorn --preload): a child process starts with an
+    empty pool instead of reusing the parent's SQLite handles.
+    """
+
+    def __init__(self, path=DB_PATH, max_idle=16):
+        self.path = path
+        self.max_idle = max_idle
+        self._idle = queue.LifoQueue(maxsize=max_idle)
+        self._pid = os.getpid()
+        self._fork_lock = threading.Lock()
+
+    def _check_fork(self):
+        if self._pid == os.getpid():
+            return
+        with self._fork_lock:
+            if self._pid != os.getpid():
+                idle, self._idle = self._idle, queue.LifoQueue(maxsize=self.max_idle)
+                _inherited.extend(idle.queue)
+                self._pid = os.getpid()
+
+    def _connect(self):
+        # Connections are handed between threads, but only ever used by one at a time
+        conn = sqlite3.connect(
+            self.path,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE,
+            factory=_PooledConnection
+        )
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def acquire(self):
+        self._check_fork()
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return self._connect()
+
+    def release(self, conn):
+        self._check_fork()
+        if conn.pid != os.getpid():
+            # Acquired before a fork; the parent still owns the handle
+            _inherited.append(conn)
+            return
+        if conn.in_transaction:
+            conn.rollback()
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close_all(self):
+        self._check_fork()
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Process-wide pool, created on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(DB_PATH)
+    return _pool
+
+
+def configure(path):
+    """Point the process-wide pool at another database file"""
+    global _pool, DB_PATH
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close_all()
+        DB_PATH = path
+        _pool = ConnectionPool(path)
+    return _pool
+
+
+# Schema changes applied in order; PRAGMA user_version records how many have run
+MIGRATIONS = [
+    (
+        # Keep only the newest rating per (user, game) before enforcing uniqueness
+        '''DELETE FROM interactions
+           WHERE interaction_type = 'rating' AND rowid NOT IN (
+               SELECT MAX(rowid) FROM interactions
+               WHERE interaction_type = 'rating'
+               GROUP BY user_id, game_url)''',
+        '''CREATE UNIQUE INDEX IF NOT EXISTS idx_interactions_rating
+           ON interactions (user_id, game_url) WHERE interaction_type = 'rating' ''',
+        '''CREATE INDEX IF NOT EXISTS idx_interactions_user_type_time
+           ON interactions (user_id, interaction_type, timestamp)''',
+    ),
+    (
+        # Offline top-N per user written by batch_recommend.py
+        '''CREATE TABLE IF NOT EXISTS precomputed_recommendations
+           (user_id INTEGER,
+            rank INTEGER,
+            game_url TEXT,
+            score REAL,
+            computed_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (user_id, rank)) WITHOUT ROWID''',
+    ),
+]
+
+
+def migrate(conn):
+    """Apply any pending migrations, each in its own transaction"""
+    version = conn.execute('PRAGMA user_version').fetchone()[0]
+    for target, statements in enumerate(MIGRATIONS[version:], start=version + 1):
+        if conn.in_transaction:
+            conn.commit()
+        try:
+            conn.execute('BEGIN')
+            for statement in statements:
+                conn.execute(statement)
+            conn.execute(f'PRAGMA user_version = {target}')
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        print(f"Applied database migration {target}")
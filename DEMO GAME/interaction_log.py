@@ -0,0 +1,113 @@
+"""Background, batched writes of interaction events to recommendations.db"""
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+import db
+
+INSERT_SQL = '''INSERT INTO interactions
+                (user_id, game_url, interaction_type, value, timestamp)
+                VALUES (?, ?, ?, ?, ?)'''
+
+_STOP = object()
+
+
+class InteractionWriter:
+    """Queues interaction events and flushes them in one transaction per batch.
+
+    A batch is written once it reaches batch_size events or flush_interval
+    seconds after its first event, whichever comes first. When the queue is
+    full, log() waits up to put_timeout seconds and then drops the event.
+    """
+
+    def __init__(self, pool=None, batch_size=200, flush_interval=0.5,
+                 max_queue=10000, put_timeout=0.05):
+        self.pool = pool
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def _ensure_started(self):
+        # Threads do not survive fork, so each worker process starts its own
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(
+                    target=self._run, name='interaction-writer', daemon=True
+                )
+                self._thread.start()
+
+    def log(self, user_id, game_url, interaction_type, value=None):
+        """Queue one event; returns False if it was dropped under backpressure"""
+        self._ensure_started()
+        # Same format as CURRENT_TIMESTAMP, captured when the event happened
+        timestamp = time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime())
+        try:
+            self._queue.put(
+                (user_id, game_url, interaction_type, value, timestamp),
+                timeout=self.put_timeout
+            )
+            return True
+        except queue.Full:
+            # Request threads drop concurrently; += is not atomic
+            with self._lock:
+                self.dropped += 1
+            return False
+
+    def log_view(self, user_id, game_url):
+        return self.log(user_id, game_url, 'view')
+
+    def _run(self):
+        batch = []
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is _STOP:
+                self._flush(batch)
+                return
+            if item is not None:
+                if not batch:
+                    deadline = time.monotonic() + self.flush_interval
+                batch.append(item)
+
+            if batch and (len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                self._flush(batch)
+                batch = []
+                deadline = None
+
+    def _flush(self, batch):
+        if not batch:
+            return
+        pool = self.pool or db.get_pool()
+        try:
+            with pool.connection() as conn:
+                conn.executemany(INSERT_SQL, batch)
+                conn.commit()
+            self.written += len(batch)
+        except sqlite3.Error as e:
+            self.failed += len(batch)
+            print(f"Error writing {len(batch)} interactions: {e}")
+
+    def close(self, timeout=5):
+        """Flush queued events and stop the writer thread"""
+        if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
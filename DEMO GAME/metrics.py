@@ -0,0 +1,164 @@
+"""Process-local timing histograms, counters and sampled request profiling.
+
+Metrics are kept per process and rendered in the Prometheus text format;
+with several app workers, scrape each worker or aggregate them upstream.
+"""
+import cProfile
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+# Histogram upper bounds in seconds
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+HELP = {
+    'recommender_stage_seconds': 'Time spent in each stage of get_recommendations',
+    'recommender_fallback_total': 'Recommendations served from the popularity ranking instead',
+    'app_db_seconds': 'Time spent in SQLite calls made by app routes',
+    'app_render_seconds': 'Time spent rendering templates',
+    'app_request_seconds': 'Request latency by endpoint'
+}
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (
+        (key, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for key, value in labels
+    )
+    return '{' + ','.join(f'{key}="{value}"' for key, value in escaped) + '}'
+
+
+class Registry:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        # (name, labels) -> per-bucket counts (+Inf last), sum, count
+        self._histograms = {}
+        self._counters = {}
+
+    def observe(self, name, seconds, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            counts = histogram[0]
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+            histogram[1] += seconds
+            histogram[2] += 1
+
+    def increment(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    @contextmanager
+    def timer(self, name, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def render(self, gauges=()):
+        """Prometheus text exposition; gauges are extra (name, type, value, labels) samples"""
+        with self._lock:
+            histograms = {key: (list(h[0]), h[1], h[2]) for key, h in self._histograms.items()}
+            counters = dict(self._counters)
+
+        lines = []
+        described = set()
+
+        def describe(name, kind):
+            if name not in described:
+                described.add(name)
+                if name in HELP:
+                    lines.append(f'# HELP {name} {HELP[name]}')
+                lines.append(f'# TYPE {name} {kind}')
+
+        for (name, labels), (counts, total, count) in sorted(histograms.items()):
+            describe(name, 'histogram')
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += bucket_count
+                lines.append(f'{name}_bucket{_format_labels(labels + (("le", bound),))} {cumulative}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {total}')
+            lines.append(f'{name}_count{_format_labels(labels)} {count}')
+
+        for (name, labels), value in sorted(counters.items()):
+            describe(name, 'counter')
+            lines.append(f'{name}{_format_labels(labels)} {value}')
+
+        for name, kind, value, labels in gauges:
+            describe(name, kind)
+            lines.append(f'{name}{_format_labels(tuple(sorted(labels.items())))} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+class RequestProfiler:
+    """cProfile for a random sample of requests, switchable at runtime.
+
+    Only one request is profiled at a time; each sampled request is written
+    as a .prof file (readable with pstats or snakeviz) and the oldest files
+    beyond `keep` are removed.
+    """
+
+    def __init__(self, output_dir, keep=50):
+        self.output_dir = output_dir
+        self.keep = keep
+        self.rate = 0.0
+        self._busy = threading.Lock()
+
+    def start(self):
+        if self.rate <= 0 or random.random() >= self.rate:
+            return None
+        if not self._busy.acquire(blocking=False):
+            return None
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler is already active in this process
+            self._busy.release()
+            return None
+        return profile
+
+    def stop(self, profile, label):
+        try:
+            profile.disable()
+        finally:
+            self._busy.release()
+        os.makedirs(self.output_dir, exist_ok=True)
+        safe_label = ''.join(c if c.isalnum() or c in '-_.' else '_' for c in label)
+        path = os.path.join(self.output_dir, f'{time.time():.6f}-{safe_label}.prof')
+        profile.dump_stats(path)
+        self._prune()
+        return path
+
+    def recent(self):
+        if not os.path.isdir(self.output_dir):
+            return []
+        return sorted(name for name in os.listdir(self.output_dir) if name.endswith('.prof'))
+
+    def _prune(self):
+        for name in self.recent()[:-self.keep]:
+            try:
+                os.remove(os.path.join(self.output_dir, name))
+            except OSError:
+                pass
+
+
+REGISTRY = Registry()
+observe = REGISTRY.observe
+increment = REGISTRY.increment
+timer = REGISTRY.timer
+render = REGISTRY.render
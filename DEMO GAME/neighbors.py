@@ -0,0 +1,272 @@
+"""Neighbour-search engines that turn TF-IDF rows into a sparse top-K graph.
+
+Every engine returns an N x N CSR matrix whose row i holds game i's nearest
+neighbours with their TF-IDF cosine similarity, so GameRecommender scores
+users the same way whichever engine built the graph.
+
+With n_jobs > 1 the blocks are scored by a process pool. The TF-IDF matrix
+is written once to a temporary directory and every worker memory-maps it,
+so the input is shared rather than pickled per task.
+"""
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from sklearn.decomposition import TruncatedSVD
+
+# Upper bound on dense similarity cells held in memory per block, across all workers
+SIMILARITY_BLOCK_CELLS = 2 ** 24
+
+
+def save_csr(path, name, matrix):
+    """Store CSR arrays as raw .npy files so they can be memory-mapped"""
+    np.save(os.path.join(path, f'{name}_data.npy'), matrix.data)
+    np.save(os.path.join(path, f'{name}_indices.npy'), matrix.indices)
+    np.save(os.path.join(path, f'{name}_indptr.npy'), matrix.indptr)
+    np.save(os.path.join(path, f'{name}_shape.npy'), np.asarray(matrix.shape))
+
+
+def load_csr(path, name, mmap_mode='r'):
+    """Wrap stored CSR arrays without copying them into process memory"""
+    arrays = [
+        np.load(os.path.join(path, f'{name}_{part}.npy'), mmap_mode=mmap_mode)
+        for part in ('data', 'indices', 'indptr')
+    ]
+    shape = tuple(np.load(os.path.join(path, f'{name}_shape.npy')))
+    return csr_matrix(tuple(arrays), shape=shape, copy=False)
+
+
+# Read-only matrices of a pool worker, memory-mapped by _init_worker
+_shared = {}
+
+
+def _init_worker(path, names):
+    for name in names:
+        _shared[name] = load_csr(path, name)
+
+
+def _run_shared(fn, *task):
+    return fn(_shared, *task)
+
+
+def _map_shared(fn, matrices, tasks, n_jobs):
+    """fn(matrices, *task) for every task, across n_jobs processes, in task order"""
+    if n_jobs <= 1:
+        return [fn(matrices, *task) for task in tasks]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, matrix in matrices.items():
+            save_csr(tmp, name, matrix)
+        with ProcessPoolExecutor(
+            n_jobs, initializer=_init_worker, initargs=(tmp, list(matrices))
+        ) as executor:
+            futures = [executor.submit(_run_shared, fn, *task) for task in tasks]
+            return [future.result() for future in futures]
+
+
+def _merge(results, n_games):
+    rows, cols, vals = [], [], []
+    for block_rows, block_cols, block_vals in results:
+        rows.append(block_rows)
+        cols.append(block_cols)
+        vals.append(block_vals)
+    return _to_csr(rows, cols, vals, n_games)
+
+
+def _to_csr(rows, cols, vals, n_games):
+    if not rows:
+        return csr_matrix((n_games, n_games), dtype=np.float32)
+    return csr_matrix(
+        (np.concatenate(vals), (np.concatenate(rows), np.concatenate(cols))),
+        shape=(n_games, n_games),
+        dtype=np.float32
+    )
+
+
+def _select_top_k(sim_block, k):
+    """Column positions and values of each row's k largest entries"""
+    k = min(k, sim_block.shape[1])
+    top = np.argpartition(sim_block, -k, axis=1)[:, -k:]
+    return top, np.take_along_axis(sim_block, top, axis=1)
+
+
+def _exact_block(matrices, start, stop, k):
+    """Top-k neighbours of rows start:stop against every row"""
+    sim_block = (matrices['tfidf'][start:stop] @ matrices['tfidf_t']).toarray()
+
+    # A game is not its own neighbour
+    local = np.arange(stop - start)
+    sim_block[local, local + start] = 0
+
+    top, top_vals = _select_top_k(sim_block, k)
+    keep = top_vals > 0
+    return np.broadcast_to((local + start)[:, None], top.shape)[keep], top[keep], top_vals[keep]
+
+
+def _ivf_partition(matrices, queries, candidates, k, block_size):
+    """Top-k neighbours of `queries` among `candidates`, in bounded blocks"""
+    tfidf_matrix = matrices['tfidf']
+    candidates_t = tfidf_matrix[candidates].T.tocsr()
+    rows, cols, vals = [], [], []
+    for start in range(0, len(queries), block_size):
+        block = queries[start:start + block_size]
+        sim_block = (tfidf_matrix[block] @ candidates_t).toarray()
+
+        # A game is not its own neighbour
+        sim_block[block[:, None] == candidates[None, :]] = 0
+
+        top, top_vals = _select_top_k(sim_block, k)
+        keep = top_vals > 0
+
+        rows.append(np.broadcast_to(block[:, None], top.shape)[keep])
+        cols.append(candidates[top][keep])
+        vals.append(top_vals[keep])
+    return np.concatenate(rows), np.concatenate(cols), np.concatenate(vals)
+
+
+class ExactNeighbors:
+    """Exact cosine top-K, streamed one bounded dense block at a time"""
+
+    name = 'exact'
+
+    def __init__(self, top_k, n_jobs=1):
+        self.top_k = top_k
+        self.n_jobs = n_jobs
+
+    def settings(self):
+        return {'engine': self.name, 'top_k': self.top_k}
+
+    def build(self, tfidf_matrix):
+        n_games = tfidf_matrix.shape[0]
+        k = min(self.top_k, n_games - 1)
+        if k <= 0:
+            return csr_matrix((n_games, n_games), dtype=np.float32)
+
+        # Block height is chosen so the dense blocks in flight never exceed the cell budget
+        block_size = max(1, SIMILARITY_BLOCK_CELLS // (n_games * max(1, self.n_jobs)))
+        tasks = [
+            (start, min(start + block_size, n_games), k)
+            for start in range(0, n_games, block_size)
+        ]
+        matrices = {'tfidf': tfidf_matrix, 'tfidf_t': tfidf_matrix.T.tocsr()}
+        results = _map_shared(_exact_block, matrices, tasks, self.n_jobs)
+        return _merge(results, n_games)
+
+
+class IVFNeighbors:
+    """Approximate top-K with an inverted-file index over a truncated-SVD embedding.
+
+    Rows are embedded as unit float32 vectors and clustered with spherical
+    k-means into n_lists partitions. Games in a partition are compared only
+    against members of the n_probe partitions whose centroids are closest to
+    their own, so each game scores roughly n_probe / n_lists of the catalogue.
+    Candidates are scored with their exact TF-IDF cosine.
+    """
+
+    name = 'ivf'
+
+    def __init__(self, top_k, n_components=128, n_lists=None, n_probe=8,
+                 kmeans_iters=10, seed=0, n_jobs=1):
+        self.top_k = top_k
+        self.n_jobs = n_jobs
+        self.n_components = n_components
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.kmeans_iters = kmeans_iters
+        self.seed = seed
+
+    def settings(self):
+        return {
+            'engine': self.name, 'top_k': self.top_k,
+            'n_components': self.n_components, 'n_lists': self.n_lists,
+            'n_probe': self.n_probe, 'kmeans_iters': self.kmeans_iters,
+            'seed': self.seed
+        }
+
+    def embed(self, tfidf_matrix):
+        """Reduce TF-IDF rows to L2-normalised dense float32 vectors"""
+        n_components = min(self.n_components, tfidf_matrix.shape[1] - 1, tfidf_matrix.shape[0] - 1)
+        svd = TruncatedSVD(n_components=max(1, n_components), random_state=self.seed)
+        embedding = svd.fit_transform(tfidf_matrix).astype(np.float32)
+        norms = np.linalg.norm(embedding, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        return np.ascontiguousarray(embedding / norms)
+
+    def _assign(self, embedding, centroids):
+        """Nearest centroid per row, computed in bounded blocks"""
+        labels = np.empty(len(embedding), dtype=np.int64)
+        block_size = max(1, SIMILARITY_BLOCK_CELLS // max(1, len(centroids)))
+        for start in range(0, len(embedding), block_size):
+            labels[start:start + block_size] = np.argmax(
+                embedding[start:start + block_size] @ centroids.T, axis=1
+            )
+        return labels
+
+    def _train_centroids(self, embedding, n_lists, rng):
+        """Spherical k-means on a sample of the embedding"""
+        sample_size = min(len(embedding), 256 * n_lists)
+        sample = embedding[rng.choice(len(embedding), sample_size, replace=False)]
+        centroids = sample[rng.choice(sample_size, n_lists, replace=False)].copy()
+
+        for _ in range(self.kmeans_iters):
+            labels = self._assign(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            norms = np.linalg.norm(sums, axis=1)
+
+            # Re-seed empty partitions from random sample points
+            empty = norms == 0
+            if empty.any():
+                sums[empty] = sample[rng.choice(sample_size, int(empty.sum()))]
+                norms[empty] = np.linalg.norm(sums[empty], axis=1)
+            centroids = sums / np.maximum(norms, 1e-12)[:, None]
+        return centroids.astype(np.float32)
+
+    def build(self, tfidf_matrix):
+        n_games = tfidf_matrix.shape[0]
+        k = min(self.top_k, n_games - 1)
+        if k <= 0:
+            return csr_matrix((n_games, n_games), dtype=np.float32)
+
+        rng = np.random.default_rng(self.seed)
+        embedding = self.embed(tfidf_matrix)
+        n_lists = self.n_lists or max(1, int(np.sqrt(n_games)))
+        n_lists = min(n_lists, n_games)
+        centroids = self._train_centroids(embedding, n_lists, rng)
+        labels = self._assign(embedding, centroids)
+
+        # Inverted lists: members of each partition, in row order
+        order = np.argsort(labels, kind='stable')
+        bounds = np.searchsorted(labels[order], np.arange(n_lists + 1))
+        members = [order[bounds[c]:bounds[c + 1]] for c in range(n_lists)]
+
+        n_probe = min(self.n_probe, n_lists)
+        probes = np.argpartition(-(centroids @ centroids.T), n_probe - 1, axis=1)[:, :n_probe]
+
+        tasks = []
+        for c in range(n_lists):
+            queries = members[c]
+            if len(queries) == 0:
+                continue
+            candidates = np.concatenate([members[p] for p in probes[c]])
+            block_size = max(1, SIMILARITY_BLOCK_CELLS // (len(candidates) * max(1, self.n_jobs)))
+            tasks.append((queries, candidates, k, block_size))
+
+        results = _map_shared(_ivf_partition, {'tfidf': tfidf_matrix}, tasks, self.n_jobs)
+        return _merge(results, n_games)
+
+ENGINES = {
+    ExactNeighbors.name: ExactNeighbors,
+    IVFNeighbors.name: IVFNeighbors
+}
+
+
+def make_engine(name, top_k, **options):
+    """Instantiate a neighbour engine by name ('exact' or 'ivf')"""
+    try:
+        engine_cls = ENGINES[name]
+    except KeyError:
+        raise ValueError(f"Unknown neighbour engine: {name!r}") from None
+    return engine_cls(top_k, **options)
@@ -0,0 +1,77 @@
+"""Bounded per-user cache of recommendation lists"""
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+class RecommendationCache:
+    """LRU cache with a time-to-live, keyed by user id.
+
+    Each user has one entry holding the longest list computed for them, so a
+    request for fewer items is served from a slice of it. Lists are stored as
+    int32 catalogue rows, not records, so an entry costs 4 bytes per item.
+
+    Entries carry the version of the user's ratings they were computed from;
+    a lookup with a different version misses, so a rating saved through any
+    worker process retires the entry in every other one.
+    """
+
+    def __init__(self, max_entries=10000, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # user_id -> (expires_at, top_n, version, rows)
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, user_id, top_n, version=None):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                expires_at, cached_n, cached_version, rows = entry
+                fresh = expires_at > now and cached_version == version
+                if fresh and cached_n >= top_n:
+                    self._entries.move_to_end(user_id)
+                    self.hits += 1
+                    return rows[:top_n]
+                if not fresh:
+                    del self._entries[user_id]
+            self.misses += 1
+            return None
+
+    def put(self, user_id, top_n, rows, version=None):
+        if self.max_entries <= 0:
+            return
+        rows = np.array(rows, dtype=np.int32)
+        # Hits hand out slices of this array, so nobody may write to it
+        rows.flags.writeable = False
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + self.ttl, top_n, version, rows)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
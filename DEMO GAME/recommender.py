@@ -96,164 +96,757 @@
 
 import pandas as pd
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
 from sklearn.feature_extraction.text import TfidfVectorizer
-from collections import defaultdict
-import sqlite3
+from collections import OrderedDict, defaultdict
+import logging
 import os
-from scipy.sparse import csr_matrix
+import json
+import shutil
+import hashlib
+import tempfile
+import threading
+from scipy.sparse import csr_matrix, vstack
+import db
+import metrics
+from catalogue import REQUIRED_COLUMNS, clean_chunk, combined_features, compact, fit_tfidf, read_catalogue
+from neighbors import SIMILARITY_BLOCK_CELLS, load_csr, make_engine, save_csr
+from recommendation_cache import RecommendationCache
+
+logger = logging.getLogger(__name__)
+
+# Neighbours kept per game in the similarity index
+DEFAULT_TOP_K = 50
+
+# Bump whenever the on-disk artifact layout changes
+ARTIFACT_VERSION = 2
+
+TFIDF_SETTINGS = {
+    'stop_words': 'english',
+    'max_features': 2000,  # Reduced features
+    'ngram_range': (1, 1)  # Only unigrams
+}
+
+# Extra share of out-of-vocabulary tokens in ingested games that forces a refit
+VOCABULARY_DRIFT_THRESHOLD = 0.15
+
+# Existing documents sampled to measure the fitted vocabulary's baseline coverage
+DRIFT_BASELINE_SAMPLE = 1000
+
+# Thresholds for a game to appear in the popularity ranking
+POPULAR_MIN_RATING_COUNT = 10
+POPULAR_MIN_AVG_RATING = 3.5
+
+# Records kept pre-serialized at the head of the global popularity ranking
+POPULAR_PRESERIALIZED = 100
+
+# Most recently used record dicts kept per worker
+RECORD_CACHE_SIZE = 2048
+
+# Share of the blended score taken by the collaborative-filtering model
+DEFAULT_CF_WEIGHT = 0.3
+
+# Numeric game columns stored alongside the index as memory-mapped arrays
+NUMERIC_COLUMNS = {
+    'Average User Rating': 'avg_rating',
+    'User Rating Count': 'rating_count'
+}
+
 
 class GameRecommender:
-    def __init__(self, data_path, max_games=5000):
+    def __init__(self, data_path, max_games=None, top_k=DEFAULT_TOP_K,
+                 cache_dir=None, mmap=True, rec_cache_size=10000, rec_cache_ttl=300,
+                 engine='exact', engine_options=None, on_chunk=None, n_jobs=1):
         """Initialize with memory limits"""
         try:
-            # Load game data with memory optimization
-            self.games_df = pd.read_csv(data_path, nrows=max_games)
+            self.data_path = data_path
+            self.max_games = max_games
+            self.top_k = top_k
+            self.n_jobs = n_jobs
+            self.engine = make_engine(engine, top_k, n_jobs=n_jobs, **(engine_options or {}))
+            self.mmap = mmap
+            self.cache_dir = cache_dir or os.path.join(os.path.dirname(data_path), 'cache')
+            self.rec_cache = RecommendationCache(rec_cache_size, rec_cache_ttl)
+            self._update_lock = threading.Lock()
+            self._drift_baseline = None
+            self.cf_model = None
+            self.cf_weight = DEFAULT_CF_WEIGHT
+            self._cf_item_factors = None
+
+            # Stream only the needed columns; on_chunk sees each raw chunk
+            self.games_df = read_catalogue(data_path, max_games, on_chunk=on_chunk)
             
             # Validate required columns
-            required_columns = {
-                'URL', 'Name', 'Icon URL', 'Average User Rating',
-                'User Rating Count', 'Description', 'Developer',
-                'Primary Genre', 'Genres'
-            }
-            missing_cols = required_columns - set(self.games_df.columns)
-            if missing_cols:
-                raise ValueError(f"Missing columns: {missing_cols}")
+            self._check_columns(self.games_df)
             
             self._create_mappings()
             self.prepare_data()
-            self.build_similarity_matrix()
-            
+            if not self.load_artifact():
+                self.build_similarity_matrix()
+            self.build_popularity_ranking()
+            self.build_facet_indexes()
+
         except Exception as e:
             raise RuntimeError(f"Initialization failed: {str(e)}")
 
+    @staticmethod
+    def _check_columns(df):
+        missing_cols = REQUIRED_COLUMNS - set(df.columns)
+        if missing_cols:
+            raise ValueError(f"Missing columns: {missing_cols}")
+
     def _create_mappings(self):
         """Create memory-efficient mappings"""
-        self.games_df = self.games_df.drop_duplicates(subset=['URL'])
+        self.games_df = self.games_df.drop_duplicates(subset=['URL']).reset_index(drop=True)
         self.game_id_to_idx = {
             game_id: idx for idx, game_id in enumerate(self.games_df['URL'])
         }
         self.idx_to_game_id = {
             idx: game_id for game_id, idx in self.game_id_to_idx.items()
         }
+        self._build_lookup_indexes()
+
+    def _build_lookup_indexes(self):
+        """Hash lowercase names and app store IDs to rows; the first game with a key wins"""
+        self.name_to_idx = {}
+        for idx, name in enumerate(self.games_df['Name'].astype(str).str.lower()):
+            self.name_to_idx.setdefault(name, idx)
+        self.id_to_idx = {}
+        if 'ID' in self.games_df.columns:
+            for idx, game_id in enumerate(self.games_df['ID']):
+                if not pd.isna(game_id):
+                    self.id_to_idx.setdefault(int(game_id), idx)
+        # Recently used record dicts, so hot games skip the row conversion
+        self._records = OrderedDict()
+        self._records_lock = threading.Lock()
+
+    def _record(self, idx):
+        """Record dict for a row, shaped like to_dict('records'); callers get their own copy"""
+        with self._records_lock:
+            record = self._records.get(idx)
+            if record is not None:
+                self._records.move_to_end(idx)
+                return dict(record)
+        record = self.games_df.iloc[idx].to_dict()
+        record['Average User Rating'] = self.avg_rating[idx]
+        record['User Rating Count'] = np.int32(self.rating_count[idx])
+        with self._records_lock:
+            self._records[idx] = record
+            if len(self._records) > RECORD_CACHE_SIZE:
+                self._records.popitem(last=False)
+        return dict(record)
 
     def prepare_data(self):
-        """Clean data with memory efficiency"""
-        text_cols = ['Description', 'Primary Genre', 'Genres', 'Developer']
-        for col in text_cols:
-            if col in self.games_df.columns:
-                self.games_df[col] = self.games_df[col].fillna('').astype(str)
-        
-        self.games_df['combined_features'] = (
-            self.games_df['Primary Genre'] + ' ' + 
-            self.games_df['Genres'] + ' ' + 
-            self.games_df['Description'].str[:500] + ' ' +  # Limit description size
-            self.games_df['Developer']
-        )
+        """Compact dtypes and move numeric columns into float32 arrays"""
+        compact(self.games_df)
+        present = [column for column in NUMERIC_COLUMNS if column in self.games_df.columns]
+        for column in present:
+            setattr(self, NUMERIC_COLUMNS[column], self.games_df[column].to_numpy(dtype=np.float32))
+        # The arrays are the only copy, so memory-mapped ones are shared between workers
+        self.games_df = self.games_df.drop(columns=present)
 
     def build_similarity_matrix(self):
-        """Build memory-efficient similarity matrix"""
-        tfidf = TfidfVectorizer(
-            stop_words='english',
-            max_features=2000,  # Reduced features
-            ngram_range=(1, 1)  # Only unigrams
-        )
-        
-        # Use sparse matrices
-        tfidf_matrix = tfidf.fit_transform(self.games_df['combined_features'])
-        
-        # Calculate similarity in batches
-        self.similarity_batches = []
-        batch_size = 1000
-        for i in range(0, tfidf_matrix.shape[0], batch_size):
-            batch = tfidf_matrix[i:i+batch_size]
-            sim_batch = cosine_similarity(batch, tfidf_matrix)
-            self.similarity_batches.append(csr_matrix(sim_batch))  # Keep sparse
+        """Build sparse top-K similarity index"""
+        # Rows are L2-normalised, so dot products are cosine similarities
+        self.tfidf, self.tfidf_matrix = fit_tfidf(self.games_df, TFIDF_SETTINGS, self.n_jobs)
+        self.similarity_index = self.engine.build(self.tfidf_matrix)
+
+    def _artifact_key(self):
+        """Hash of the CSV contents and every setting that shapes the index"""
+        digest = hashlib.sha256()
+        with open(self.data_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        settings = {
+            'version': ARTIFACT_VERSION,
+            'tfidf': TFIDF_SETTINGS,
+            'engine': self.engine.settings(),
+            'max_games': self.max_games
+        }
+        digest.update(json.dumps(settings, sort_keys=True).encode())
+        return digest.hexdigest()
+
+    def _artifact_dir(self):
+        return os.path.join(self.cache_dir, f"v{ARTIFACT_VERSION}-{self._artifact_key()[:16]}")
+
+    def load_artifact(self):
+        """Load a previously built index, returning False if it is missing or stale"""
+        path = self._artifact_dir()
+        try:
+            with open(os.path.join(path, 'ids.json')) as f:
+                ids = json.load(f)
+            if ids != self.games_df['URL'].tolist():
+                return False
+
+            with open(os.path.join(path, 'vocabulary.json')) as f:
+                vocab = json.load(f)
+            self.tfidf = TfidfVectorizer(
+                **TFIDF_SETTINGS, vocabulary=vocab['terms'], dtype=np.float32
+            )
+            self.tfidf.idf_ = np.asarray(vocab['idf'], dtype=np.float32)
+
+            # Read-only mappings let every worker share one copy via the page cache
+            mmap_mode = 'r' if self.mmap else None
+            self.tfidf_matrix = load_csr(path, 'tfidf', mmap_mode)
+            self.similarity_index = load_csr(path, 'similarity', mmap_mode)
+            for column, name in NUMERIC_COLUMNS.items():
+                setattr(self, name, np.load(os.path.join(path, f'{name}.npy'), mmap_mode=mmap_mode))
+            return True
+        except (OSError, ValueError, KeyError):
+            return False
+
+    def save_artifact(self):
+        """Write the fitted vectorizer and index to the cache directory"""
+        path = self._artifact_dir()
+        if os.path.isdir(path):
+            return path
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = tempfile.mkdtemp(dir=self.cache_dir)
+        try:
+            save_csr(tmp_path, 'tfidf', self.tfidf_matrix)
+            save_csr(tmp_path, 'similarity', self.similarity_index)
+            for column, name in NUMERIC_COLUMNS.items():
+                np.save(os.path.join(tmp_path, f'{name}.npy'), getattr(self, name))
+            terms = self.tfidf.get_feature_names_out().tolist()
+            with open(os.path.join(tmp_path, 'vocabulary.json'), 'w') as f:
+                json.dump({'terms': terms, 'idf': self.tfidf.idf_.tolist()}, f)
+            with open(os.path.join(tmp_path, 'ids.json'), 'w') as f:
+                json.dump(self.games_df['URL'].tolist(), f)
+
+            # Rename is atomic, so concurrent readers never see a partial artifact
+            os.rename(tmp_path, path)
+        except OSError:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            if not os.path.isdir(path):
+                raise
+        return path
 
     def _get_similarity_row(self, idx):
-        """Get similarity row from batches"""
-        batch_idx = idx // 1000
-        row_in_batch = idx % 1000
-        return self.similarity_batches[batch_idx].getrow(row_in_batch).toarray()[0]
+        """Get dense similarity row from the top-K index"""
+        return self.similarity_index.getrow(idx).toarray()[0]
+
+    def refit(self):
+        """Refit the vectorizer and rebuild every derived structure from games_df"""
+        with self._update_lock:
+            self._refit()
+
+    def _refit(self):
+        self._create_mappings()
+        self.prepare_data()
+        self.build_similarity_matrix()
+        self.build_popularity_ranking()
+        self.build_facet_indexes()
+        self._drift_baseline = None
+        self._align_collaborative()
+        self.rec_cache.clear()
+
+    def add_games(self, games):
+        """Append new games without a full rebuild; returns their row indices.
+
+        `games` is a DataFrame or a list of record dicts with the catalogue columns.
+        """
+        new_df = self._incoming_frame(games)
+        existing = [url for url in new_df['URL'] if url in self.game_id_to_idx]
+        if existing:
+            raise ValueError(f"Games already in catalogue: {existing[:5]}")
+        return self._ingest(new_df, None)
+
+    def update_games(self, games):
+        """Replace existing games, matched by URL, and recompute their neighbours"""
+        new_df = self._incoming_frame(games)
+        missing = [url for url in new_df['URL'] if url not in self.game_id_to_idx]
+        if missing:
+            raise KeyError(f"Games not in catalogue: {missing[:5]}")
+        positions = np.array([self.game_id_to_idx[url] for url in new_df['URL']], dtype=np.int64)
+        return self._ingest(new_df, positions)
+
+    def _incoming_frame(self, games):
+        new_df = pd.DataFrame(games)
+        self._check_columns(new_df)
+        new_df = new_df.drop_duplicates(subset=['URL'], keep='last').reset_index(drop=True)
+        return clean_chunk(new_df)
+
+    def _vocabulary_drift(self, documents):
+        """Out-of-vocabulary token rate of documents above the fitted corpus' own rate"""
+        analyzer = self.tfidf.build_analyzer()
+        vocabulary = self.tfidf.vocabulary_
+
+        def oov_rate(docs):
+            tokens = [token for doc in docs for token in analyzer(doc)]
+            if not tokens:
+                return 0.0
+            return sum(token not in vocabulary for token in tokens) / len(tokens)
+
+        # max_features truncates the vocabulary, so some OOV tokens are normal
+        if self._drift_baseline is None:
+            sample = self.games_df.sample(min(len(self.games_df), DRIFT_BASELINE_SAMPLE), random_state=0)
+            self._drift_baseline = oov_rate(combined_features(sample))
+        return oov_rate(documents) - self._drift_baseline
+
+    def _ingest(self, new_df, positions):
+        """Overwrite rows at `positions` with new_df, or append it when positions is None"""
+        with self._update_lock:
+            n_old = len(self.games_df)
+            numeric = {
+                name: new_df[column].to_numpy(dtype=np.float32)
+                for column, name in NUMERIC_COLUMNS.items()
+            }
+            new_df = new_df.drop(columns=list(NUMERIC_COLUMNS))
+            if positions is None:
+                changed = np.arange(n_old, n_old + len(new_df))
+                games_df = pd.concat([self.games_df, new_df], ignore_index=True)
+                for name, values in numeric.items():
+                    numeric[name] = np.concatenate([getattr(self, name), values])
+            else:
+                changed = positions
+                for name, values in numeric.items():
+                    # np.array copies, so a read-only memory map is never written
+                    array = np.array(getattr(self, name))
+                    array[positions] = values
+                    numeric[name] = array
+                games_df = self.games_df.copy()
+                for column in new_df.columns.intersection(games_df.columns):
+                    values = new_df[column].to_numpy()
+                    if isinstance(games_df[column].dtype, pd.CategoricalDtype):
+                        new_categories = pd.Index(values).unique().difference(games_df[column].cat.categories)
+                        games_df[column] = games_df[column].cat.add_categories(new_categories)
+                    games_df.loc[positions, column] = values
+            # Appending to a categorical with unseen values falls back to object
+            compact(games_df)
+            n_total = len(games_df)
+
+            documents = combined_features(new_df)
+            if self._vocabulary_drift(documents) > VOCABULARY_DRIFT_THRESHOLD:
+                logger.warning("Vocabulary drift above %.0f%%, refitting", VOCABULARY_DRIFT_THRESHOLD * 100)
+                self.games_df = games_df
+                for name, values in numeric.items():
+                    setattr(self, name, values)
+                self._refit()
+                return changed
+
+            new_tfidf = self.tfidf.transform(documents).astype(np.float32)
+            if positions is None:
+                tfidf_matrix = vstack([self.tfidf_matrix, new_tfidf], format='csr')
+            else:
+                order = np.arange(n_total)
+                order[positions] = n_total + np.arange(len(positions))
+                tfidf_matrix = vstack([self.tfidf_matrix, new_tfidf], format='csr')[order]
+            similarity_index = self._patch_similarity(tfidf_matrix, changed)
+
+            # Swap in rows and lookups before the index, so readers never see
+            # neighbours beyond the end of games_df
+            old_names = self.games_df['Name'].astype(str).str.lower()
+            old_ids = self.games_df['ID'] if 'ID' in self.games_df.columns else None
+            self.games_df = games_df
+            for name, values in numeric.items():
+                setattr(self, name, values)
+            for idx in changed.tolist():
+                url = games_df.at[idx, 'URL']
+                self.game_id_to_idx[url] = idx
+                self.idx_to_game_id[idx] = url
+                if idx < n_old and self.name_to_idx.get(old_names[idx]) == idx:
+                    del self.name_to_idx[old_names[idx]]
+                self.name_to_idx.setdefault(str(games_df.at[idx, 'Name']).lower(), idx)
+                if old_ids is not None and idx < n_old and not pd.isna(old_ids[idx]) \
+                        and self.id_to_idx.get(int(old_ids[idx])) == idx:
+                    del self.id_to_idx[int(old_ids[idx])]
+                if 'ID' in games_df.columns and not pd.isna(games_df.at[idx, 'ID']):
+                    self.id_to_idx.setdefault(int(games_df.at[idx, 'ID']), idx)
+                with self._records_lock:
+                    self._records.pop(idx, None)
+            self.tfidf_matrix = tfidf_matrix
+            self.similarity_index = similarity_index
+            self._align_collaborative()
+            self.build_popularity_ranking()
+            self.build_facet_indexes()
+            self.rec_cache.clear()
+            return changed
+
+    def _patch_similarity(self, tfidf_matrix, changed):
+        """Recompute neighbours of the changed rows and link them into other rows.
+
+        Changed rows, and unchanged rows that had a changed game among their
+        neighbours, are rescored against the whole catalogue. Every other row
+        merges its kept neighbours with the changed games and is cut back to
+        top_k, so with the exact engine the result matches a full rebuild.
+        """
+        old = self.similarity_index
+        n_old, n_total = old.shape[0], tfidf_matrix.shape[0]
+        k = min(self.top_k, n_total - 1)
+        if k <= 0:
+            return csr_matrix((n_total, n_total), dtype=np.float32)
+        is_changed = np.zeros(n_total, dtype=bool)
+        is_changed[changed] = True
+
+        rows = np.repeat(np.arange(n_old), np.diff(old.indptr))
+        cols = np.asarray(old.indices)
+        vals = np.asarray(old.data)
+
+        # A row that loses a neighbour may be refilled by any game, so rescore it
+        rescore = is_changed.copy()
+        rescore[rows[is_changed[cols]]] = True
+        keep = ~rescore[rows]
+        rows, cols, vals = rows[keep], cols[keep], vals[keep]
+
+        # k-th best score per full row; rows short of k accept any match
+        weakest = np.zeros(n_total, dtype=np.float32)
+        if len(rows):
+            starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+            full = np.diff(np.r_[starts, len(rows)]) >= k
+            weakest[rows[starts[full]]] = np.minimum.reduceat(vals, starts)[full]
+
+        empty_idx, empty_vals = np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        forward_rows, forward_cols, forward_vals = [empty_idx], [empty_idx], [empty_vals]
+        reverse_rows, reverse_cols, reverse_vals = [empty_idx], [empty_idx], [empty_vals]
+        tfidf_t = tfidf_matrix.T.tocsr()
+        targets = np.flatnonzero(rescore)
+        block_size = max(1, SIMILARITY_BLOCK_CELLS // n_total)
+        for start in range(0, len(targets), block_size):
+            block = targets[start:start + block_size]
+            sims = (tfidf_matrix[block] @ tfidf_t).toarray()
+            sims[np.arange(len(block)), block] = 0
+
+            # Exact top-K of every rescored row
+            top = np.argpartition(sims, -k, axis=1)[:, -k:]
+            top_vals = np.take_along_axis(sims, top, axis=1)
+            found = top_vals > 0
+            forward_rows.append(np.broadcast_to(block[:, None], top.shape)[found])
+            forward_cols.append(top[found])
+            forward_vals.append(top_vals[found])
+
+            # Changed games that could enter an unchanged row's top-K
+            src = is_changed[block]
+            changed_sims = sims[src]
+            src_idx, dst = np.nonzero((changed_sims > weakest[None, :]) & ~rescore[None, :])
+            reverse_rows.append(dst)
+            reverse_cols.append(block[src][src_idx])
+            reverse_vals.append(changed_sims[src_idx, dst])
+
+        # Rows that gained candidates merge them with their kept neighbours and keep the best k
+        reverse_rows = np.concatenate(reverse_rows)
+        touched = np.zeros(n_total, dtype=bool)
+        touched[reverse_rows] = True
+        merge = touched[rows]
+        merge_rows = np.concatenate([rows[merge], reverse_rows])
+        merge_cols = np.concatenate([cols[merge], *reverse_cols])
+        merge_vals = np.concatenate([vals[merge], *reverse_vals])
+        order = np.lexsort((-merge_vals, merge_rows))
+        merge_rows, merge_cols, merge_vals = merge_rows[order], merge_cols[order], merge_vals[order]
+        rank = np.arange(len(merge_rows)) - np.searchsorted(merge_rows, merge_rows)
+        best = rank < k
+
+        return csr_matrix(
+            (
+                np.concatenate([vals[~merge], *forward_vals, merge_vals[best]]),
+                (
+                    np.concatenate([rows[~merge], *forward_rows, merge_rows[best]]),
+                    np.concatenate([cols[~merge], *forward_cols, merge_cols[best]])
+                )
+            ),
+            shape=(n_total, n_total),
+            dtype=np.float32
+        )
 
-    def get_recommendations(self, user_id, top_n=10):
-        """Memory-efficient recommendations"""
+    def get_recommendations(self, user_id, top_n=10, genre=None, tag=None, developer=None):
+        """Memory-efficient recommendations, served from the per-user cache when fresh.
+
+        genre, tag and developer restrict results to one primary genre, one
+        Genres tag and one developer; filtered results bypass the cache.
+        """
+        filters = {'genre': genre, 'tag': tag, 'developer': developer}
+        filtered = any(value is not None for value in filters.values())
         try:
-            # Get user ratings from database
-            conn = sqlite3.connect('data/recommendations.db')
+            if not filtered:
+                version = self._rating_version(user_id)
+                with metrics.timer('recommender_stage_seconds', stage='cache'):
+                    cached = self.rec_cache.get(user_id, top_n, version)
+                if cached is not None:
+                    return [self._record(idx) for idx in cached]
+            rows = self._recommend(user_id, top_n, filters)
+        except Exception:
+            # Error fallbacks are not cached so the next request retries
+            logger.exception("Recommendation error for user %s", user_id)
+            metrics.increment('recommender_fallback_total', reason='error')
+            return self.get_popular_games(top_n, **filters)
+        
+        if not filtered:
+            self.rec_cache.put(user_id, top_n, rows, version)
+        return [self._record(idx) for idx in rows]
+
+    def invalidate_user(self, user_id):
+        """Drop cached recommendations after the user's ratings change.
+
+        Only this process's cache is cleared; other workers notice the new
+        rating through _rating_version on their next lookup.
+        """
+        self.rec_cache.invalidate(user_id)
+
+    def _rating_version(self, user_id):
+        """(rating count, newest rating time) of a user, read from the shared database"""
+        with metrics.timer('recommender_stage_seconds', stage='db'), db.get_pool().connection() as conn:
+            # An index range scan on idx_interactions_user_type_time
+            return conn.execute('''SELECT COUNT(*), MAX(timestamp) FROM interactions
+                                   WHERE user_id = ? AND interaction_type = 'rating' ''',
+                                (user_id,)).fetchone()
+
+    def _user_ratings(self, user_id):
+        """(game_url, rating) pairs of a user, newest first"""
+        with metrics.timer('recommender_stage_seconds', stage='db'), db.get_pool().connection() as conn:
             c = conn.cursor()
             c.execute('''SELECT game_url, value FROM interactions 
                          WHERE user_id = ? AND interaction_type = 'rating' 
                          ORDER BY timestamp DESC''', (user_id,))
-            user_ratings = c.fetchall()
-            conn.close()
-            
-            if not user_ratings:
-                return self.get_popular_games(top_n)
-            
-            # Build user profile using batches
-            user_profile = np.zeros(len(self.games_df))
-            valid_ratings = 0
-            
-            for game_url, rating in user_ratings:
-                if game_url in self.game_id_to_idx:
-                    idx = self.game_id_to_idx[game_url]
-                    user_profile += self._get_similarity_row(idx) * rating
-                    valid_ratings += 1
-            
-            if valid_ratings == 0:
-                return self.get_popular_games(top_n)
-                
-            user_profile /= valid_ratings
-            
-            # Get top recommendations without full matrix
-            rated_game_urls = {url for url, _ in user_ratings}
-            recommendations = []
-            
-            for idx in np.argsort(user_profile)[::-1]:  # Sort descending
-                game_url = self.idx_to_game_id[idx]
-                if game_url not in rated_game_urls:
-                    recommendations.append(idx)
-                if len(recommendations) >= top_n:
-                    break
-                    
-            return self.games_df.iloc[recommendations].to_dict('records')
-            
-        except Exception as e:
-            print(f"Recommendation error: {e}")
-            return self.get_popular_games(top_n)
+            return c.fetchall()
 
-    def get_popular_games(self, top_n=10):
-        """Get popular games as fallback"""
-        try:
-            popular = self.games_df[
-                (self.games_df['User Rating Count'] > 10) & 
-                (self.games_df['Average User Rating'] >= 3.5)
-            ].sort_values(
-                by=['User Rating Count', 'Average User Rating'],
-                ascending=False
-            ).head(top_n)
-            
-            return popular.to_dict('records')
-        except:
-            # Fallback if any columns are missing
-            return self.games_df.head(top_n).to_dict('records')
+    def ranking_length(self, user_id):
+        """Length of the user's unfiltered ranking, found without scoring it"""
+        rated = {self.game_id_to_idx.get(url) for url, _ in self._user_ratings(user_id)}
+        rated.discard(None)
+        if not rated:
+            # Same fallback as _recommend: the popularity ranking
+            return len(self.popular_idx)
+        return len(self.games_df) - len(rated)
+
+    def _recommend(self, user_id, top_n, filters):
+        """Ranked catalogue rows for a user"""
+        user_ratings = self._user_ratings(user_id)
+        
+        if not user_ratings:
+            metrics.increment('recommender_fallback_total', reason='no_ratings')
+            return self._popular_rows(top_n, **filters)
+        
+        # Map rated URLs to rows, dropping games no longer in the catalogue
+        rated_idx = np.fromiter(
+            (self.game_id_to_idx.get(url, -1) for url, _ in user_ratings),
+            dtype=np.int64, count=len(user_ratings)
+        )
+        ratings = np.fromiter(
+            (rating for _, rating in user_ratings),
+            dtype=np.float32, count=len(user_ratings)
+        )
+        valid = rated_idx >= 0
+        rated_idx, ratings = rated_idx[valid], ratings[valid]
+        
+        if len(rated_idx) == 0:
+            metrics.increment('recommender_fallback_total', reason='unknown_games')
+            return self._popular_rows(top_n, **filters)
+        
+        # One sparse slice and one product build the whole profile
+        with metrics.timer('recommender_stage_seconds', stage='profile'):
+            user_profile = self.similarity_index[rated_idx].T @ ratings
+            user_profile /= len(rated_idx)
+        
+        if self._cf_item_factors is not None:
+            with metrics.timer('recommender_stage_seconds', stage='blend'):
+                user_profile = self._blend_collaborative(user_id, user_profile, rated_idx, ratings)
+        
+        with metrics.timer('recommender_stage_seconds', stage='top_n'):
+            return self._top_n(
+                user_profile, top_n, exclude=rated_idx, allowed=self.facet_mask(**filters)
+            )
+
+    def attach_collaborative(self, model, weight=DEFAULT_CF_WEIGHT):
+        """Blend a trained collaborative.ALSModel into recommendation scores"""
+        with self._update_lock:
+            self.cf_model = model
+            self.cf_weight = weight
+            self._align_collaborative()
+        self.rec_cache.clear()
+
+    def _align_collaborative(self):
+        """Re-order the model's item factors to the current catalogue rows"""
+        if self.cf_model is not None:
+            self._cf_item_factors = self.cf_model.aligned_item_factors(
+                self.game_id_to_idx, len(self.games_df)
+            )
+
+    def _cf_user_vector(self, user_id, rated_idx, ratings):
+        row = self.cf_model.user_index.get(user_id)
+        if row is not None:
+            return self.cf_model.user_factors[row]
+        # Users who rated after training get a factor solved from their ratings
+        return self.cf_model.fold_in(self._cf_item_factors[rated_idx], ratings)
+
+    def _blend_collaborative(self, user_id, content, rated_idx, ratings):
+        """Mix content and CF scores, each scaled to a max magnitude of 1"""
+        cf = self._cf_item_factors @ self._cf_user_vector(user_id, rated_idx, ratings)
+        return self._mix_scores(content, cf)
+
+    def _mix_scores(self, content, cf):
+        """Weighted sum of content and CF scores, scaled per user (last axis)"""
+        def scaled(scores):
+            peak = np.abs(scores).max(axis=-1, keepdims=True) if scores.shape[-1] else 0
+            return scores / np.where(peak > 0, peak, 1)
+        return (1 - self.cf_weight) * scaled(content) + self.cf_weight * scaled(cf)
+
+    def recommend_batch(self, user_ids, ratings, top_n=10):
+        """Top-N game rows and scores for many users in one sparse product.
+
+        `ratings` is a users x games CSR matrix whose rows line up with
+        user_ids. Returns (rows, scores), both len(user_ids) x k arrays.
+        Users without ratings get -inf scores and should be skipped.
+        """
+        counts = np.diff(ratings.indptr)
+        profiles = (ratings @ self.similarity_index).toarray()
+        profiles /= np.maximum(counts, 1)[:, None]
+        
+        if self._cf_item_factors is not None:
+            vectors = np.stack([
+                self._cf_user_vector(
+                    user_id,
+                    ratings.indices[ratings.indptr[i]:ratings.indptr[i + 1]],
+                    ratings.data[ratings.indptr[i]:ratings.indptr[i + 1]]
+                )
+                for i, user_id in enumerate(user_ids)
+            ])
+            profiles = self._mix_scores(profiles, vectors @ self._cf_item_factors.T)
+        
+        # Rated games are never recommended back; rating-less users score nothing
+        profiles[np.repeat(np.arange(len(counts)), counts), ratings.indices] = -np.inf
+        profiles[counts == 0] = -np.inf
+        
+        k = min(top_n, profiles.shape[1])
+        if k <= 0:
+            empty = np.empty((len(counts), 0))
+            return empty.astype(np.int64), empty
+        top = np.argpartition(-profiles, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(profiles, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind='stable')
+        return np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+
+    @staticmethod
+    def _top_n(scores, top_n, exclude=None, allowed=None):
+        """Indices of the top_n scores in descending order, skipping excluded rows.
+
+        allowed, if given, is a boolean row mask; rows outside it are skipped too.
+        """
+        excluded = None
+        if exclude is not None and len(exclude):
+            excluded = np.zeros(len(scores), dtype=bool)
+            excluded[exclude] = True
+        if allowed is not None:
+            # Rows appended after the scores were computed have no score anyway
+            blocked = ~allowed[:len(scores)]
+            excluded = blocked if excluded is None else excluded | blocked
+        if excluded is not None:
+            scores[excluded] = -np.inf
+            n_candidates = len(scores) - int(excluded.sum())
+        else:
+            n_candidates = len(scores)
+        
+        k = min(top_n, n_candidates)
+        if k <= 0:
+            return np.empty(0, dtype=np.int64)
+        
+        # Partial selection, then sort only the k winners
+        top = np.argpartition(-scores, k - 1)[:k]
+        return top[np.argsort(-scores[top], kind='stable')]
+
+    def build_popularity_ranking(self):
+        """Rank popular games once, overall and per primary genre"""
+        count, avg = self.rating_count, self.avg_rating
+        # NaN ratings compare False, so unrated games are never eligible
+        eligible = np.flatnonzero(
+            (count > POPULAR_MIN_RATING_COUNT) & (avg >= POPULAR_MIN_AVG_RATING)
+        )
+        
+        # lexsort's last key is the primary one: count desc, then average desc
+        order = np.lexsort((-avg[eligible], -count[eligible]))
+        self.popular_idx = eligible[order]
+        
+        # Grouping positions keeps each genre's slice in global ranking order
+        genres = self.games_df['Primary Genre'].to_numpy()[self.popular_idx]
+        self.popular_by_genre = {
+            genre: self.popular_idx[positions]
+            for genre, positions in pd.Series(genres).groupby(genres).indices.items()
+        }
+        
+        self._popular_records = [
+            self._record(idx) for idx in self.popular_idx[:POPULAR_PRESERIALIZED]
+        ]
+
+    def build_facet_indexes(self):
+        """Row masks for filtering by primary genre, Genres tag and developer.
+
+        Primary genres and tags are few, so each gets a boolean mask. There can
+        be a developer per handful of games, so developers get sorted row arrays
+        instead and a mask is scattered from them per query.
+        """
+        n_games = len(self.games_df)
+        primary = self.games_df['Primary Genre']
+        codes = primary.cat.codes.to_numpy()
+        self.genre_masks = {
+            genre: codes == code for code, genre in enumerate(primary.cat.categories)
+        }
+        
+        tags = self.games_df['Genres'].str.split(',').explode().str.strip()
+        tags = tags[tags.notna() & (tags != '')]
+        tag_rows = tags.index.to_numpy()
+        self.tag_masks = {}
+        for tag, positions in pd.Series(tag_rows).groupby(tags.to_numpy()).indices.items():
+            mask = np.zeros(n_games, dtype=bool)
+            mask[tag_rows[positions]] = True
+            self.tag_masks[tag] = mask
+        
+        developer = self.games_df['Developer']
+        codes = developer.cat.codes.to_numpy()
+        order = np.argsort(codes, kind='stable')
+        bounds = np.searchsorted(codes[order], np.arange(len(developer.cat.categories) + 1))
+        self.developer_rows = {
+            name: order[bounds[code]:bounds[code + 1]]
+            for code, name in enumerate(developer.cat.categories)
+        }
+
+    def facet_mask(self, genre=None, tag=None, developer=None):
+        """Boolean mask of the rows matching every given filter, or None if none is given"""
+        n_games = len(self.games_df)
+        masks = []
+        if genre is not None:
+            masks.append(self.genre_masks.get(genre, np.zeros(n_games, dtype=bool)))
+        if tag is not None:
+            masks.append(self.tag_masks.get(tag, np.zeros(n_games, dtype=bool)))
+        if developer is not None:
+            mask = np.zeros(n_games, dtype=bool)
+            mask[self.developer_rows.get(developer, [])] = True
+            masks.append(mask)
+        if not masks:
+            return None
+        # reduce builds a new array, so callers never mutate the stored masks
+        return np.logical_and.reduce(masks)
+
+    def _popular_rows(self, top_n, genre=None, tag=None, developer=None):
+        """Rows of the popularity ranking, optionally within one primary genre, tag or developer"""
+        if tag is not None or developer is not None:
+            allowed = self.facet_mask(genre, tag, developer)
+            return self.popular_idx[allowed[self.popular_idx]][:top_n]
+        if genre is None:
+            return self.popular_idx[:top_n]
+        return self.popular_by_genre.get(genre, self.popular_idx[:0])[:top_n]
+
+    def get_popular_games(self, top_n=10, genre=None, tag=None, developer=None):
+        """Get popular games as fallback, optionally within one primary genre, tag or developer"""
+        if genre is None and tag is None and developer is None and top_n <= len(self._popular_records):
+            return [dict(record) for record in self._popular_records[:top_n]]
+        return [self._record(idx) for idx in self._popular_rows(top_n, genre, tag, developer)]
 
     def get_game_details(self, game_url):
         """Get details for a specific game"""
-        try:
-            game = self.games_df[self.games_df['URL'] == game_url].iloc[0]
-            return game.to_dict()
-        except:
+        idx = self.game_id_to_idx.get(game_url)
+        if idx is None:
             return None
+        return self._record(idx)
+
+    def get_game_by_id(self, game_id):
+        """Get details for a game by its app store ID"""
+        idx = self.id_to_idx.get(game_id)
+        if idx is None:
+            return None
+        return self._record(idx)
 
     def get_game_by_name(self, game_name):
         """Lookup game by name (case insensitive)"""
-        try:
-            game = self.games_df[
-                self.games_df['Name'].str.lower() == game_name.lower()
-            ].iloc[0]
-            return game.to_dict()
-        except:
+        idx = self.name_to_idx.get(game_name.lower())
+        if idx is None:
             return None
+        return self._record(idx)
     # ... (keep existing get_popular_games, get_game_details methods) ...
\ No newline at end of file
@@ -0,0 +1,56 @@
+"""Incremental similarity patches must match an exact rebuild of the index"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+sys.path.insert(0, os.path.join(APP_DIR, 'benchmarks'))
+
+import recommender  # noqa: E402
+from neighbors import ExactNeighbors  # noqa: E402
+from recommender import GameRecommender  # noqa: E402
+from synthetic import make_catalogue  # noqa: E402
+
+TOP_K = 20
+
+
+@pytest.fixture
+def catalogue():
+    return make_catalogue(1050, seed=1)
+
+
+@pytest.fixture
+def engine(catalogue, tmp_path, monkeypatch):
+    # Ingested games come from the same vocabulary; never fall back to a refit
+    monkeypatch.setattr(recommender, 'VOCABULARY_DRIFT_THRESHOLD', float('inf'))
+    path = tmp_path / 'games.csv'
+    catalogue.iloc[:1000].to_csv(path, index=False)
+    return GameRecommender(str(path), top_k=TOP_K, cache_dir=str(tmp_path / 'cache'))
+
+
+def assert_matches_rebuild(engine):
+    patched = engine.similarity_index
+    exact = ExactNeighbors(TOP_K).build(engine.tfidf_matrix)
+    assert patched.shape == exact.shape
+    assert np.diff(patched.indptr).max() <= TOP_K
+    for idx in range(exact.shape[0]):
+        # Compare scores, not columns, so ties may pick different neighbours
+        got = np.sort(patched.getrow(idx).data)[::-1]
+        expected = np.sort(exact.getrow(idx).data)[::-1]
+        np.testing.assert_allclose(got, expected, atol=1e-6, err_msg=f"row {idx}")
+
+
+def test_add_games_matches_rebuild(engine, catalogue):
+    engine.add_games(catalogue.iloc[1000:])
+    assert_matches_rebuild(engine)
+
+
+def test_update_after_add_matches_rebuild(engine, catalogue):
+    engine.add_games(catalogue.iloc[1000:])
+    updated = catalogue.iloc[[10, 20]].copy()
+    updated['Description'] = catalogue.iloc[[500, 900]]['Description'].to_numpy()
+    engine.update_games(updated)
+    assert_matches_rebuild(engine)
@@ -0,0 +1,50 @@
+"""Train the collaborative-filtering model on the interactions table.
+
+Usage: python train_cf.py [--csv data/user_interactions.csv] [--factors 32]
+                          [--iterations 10] [--out data/cache/cf]
+"""
+import argparse
+import time
+
+import db
+from collaborative import ALSModel, load_ratings, load_ratings_csv
+from recommender import GameRecommender
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--data', default='data/Game_processed_data.csv')
+    parser.add_argument('--csv', default=None, help='extra ratings matched to games by name')
+    parser.add_argument('--factors', type=int, default=32)
+    parser.add_argument('--regularization', type=float, default=0.1)
+    parser.add_argument('--iterations', type=int, default=10)
+    parser.add_argument('--out', default='data/cache/cf')
+    args = parser.parse_args()
+
+    with db.get_pool().connection() as conn:
+        user_ids, game_urls, ratings = load_ratings(conn)
+
+    if args.csv:
+        recommender = GameRecommender(args.data)
+        name_to_url = {
+            name: recommender.idx_to_game_id[idx] for name, idx in recommender.name_to_idx.items()
+        }
+        csv_users, csv_urls, csv_ratings = load_ratings_csv(args.csv, name_to_url)
+        # Keep CSV users apart from numeric app user ids
+        user_ids += [f'csv:{user}' for user in csv_users]
+        game_urls += csv_urls
+        ratings += csv_ratings
+
+    if not ratings:
+        print("No ratings to train on")
+        return
+
+    start = time.perf_counter()
+    model = ALSModel(args.factors, args.regularization, args.iterations).fit(user_ids, game_urls, ratings)
+    path = model.save(args.out)
+    print(f"Trained on {len(ratings)} ratings from {len(model.user_ids)} users "
+          f"and {len(model.item_ids)} games in {time.perf_counter() - start:.1f}s, saved to {path}")
+
+
+if __name__ == '__main__':
+    main()
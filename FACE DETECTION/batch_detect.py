@@ -0,0 +1,210 @@
+"""Offline face and smile detection over video files and image folders.
+
+Videos are split into frame ranges and images into groups; a process pool
+works through them, each worker with its own cascades. Every frame becomes
+one JSON line:
+
+  {"source": "clips/a.mp4", "frame": 42, "faces": [{"box": [x, y, w, h], "smiles": [[x, y, w, h]]}]}
+
+(.parquet output, one row per frame with faces as a JSON string, needs
+pandas and pyarrow). Throughput is reported overall and per core.
+
+Usage: python batch_detect.py INPUT [INPUT ...] [--output detections.jsonl]
+                              [--workers N] [--chunk-frames 500] [--track N]
+                              [--profile full]
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+
+from detector import DEFAULT_PROFILE, PROFILES, FaceDetector
+from tracking import TrackingDetector
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp'}
+VIDEO_EXTENSIONS = {'.mp4', '.avi', '.mov', '.mkv', '.webm'}
+
+# Frames (or images) handed to a worker at a time
+CHUNK_FRAMES = 500
+
+_detector = None
+_track_interval = 0
+
+
+def _init_worker(track_interval=0, profile=DEFAULT_PROFILE):
+    global _detector, _track_interval
+    # One OpenCV thread per process; the pool provides the parallelism
+    cv2.setNumThreads(1)
+    _detector = FaceDetector(profile=profile)
+    _track_interval = track_interval
+
+
+def find_inputs(paths):
+    """(videos, images) under the given files and directories, in sorted order"""
+    videos, images = [], []
+    for path in paths:
+        if os.path.isdir(path):
+            files = sorted(
+                os.path.join(root, name) for root, _, names in os.walk(path) for name in names
+            )
+        else:
+            files = [path]
+        for file in files:
+            extension = os.path.splitext(file)[1].lower()
+            if extension in VIDEO_EXTENSIONS:
+                videos.append(file)
+            elif extension in IMAGE_EXTENSIONS:
+                images.append(file)
+            elif not os.path.isdir(path):
+                print(f"Skipping unsupported file: {file}")
+    return videos, images
+
+
+def plan_tasks(videos, images, chunk_frames=CHUNK_FRAMES):
+    """('video', path, start, stop) frame ranges and ('images', paths) groups"""
+    tasks = []
+    for path in videos:
+        capture = cv2.VideoCapture(path)
+        if not capture.isOpened():
+            print(f"Could not open video: {path}")
+            continue
+        n_frames = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+        capture.release()
+        if n_frames <= 0:
+            # Unknown length: one task reads to the end
+            tasks.append(('video', path, 0, None))
+            continue
+        for start in range(0, n_frames, chunk_frames):
+            tasks.append(('video', path, start, min(start + chunk_frames, n_frames)))
+    for start in range(0, len(images), chunk_frames):
+        tasks.append(('images', images[start:start + chunk_frames]))
+    return tasks
+
+
+def _record(source, frame_index, detections):
+    return {
+        'source': source,
+        'frame': frame_index,
+        'faces': [{'box': list(d['box']), 'smiles': [list(s) for s in d['smiles']]} for d in detections]
+    }
+
+
+def run_task(task):
+    """Detection records for one task and the seconds spent on it"""
+    start_time = time.perf_counter()
+    records = []
+    if task[0] == 'video':
+        _, path, start, stop = task
+        # Tracking state starts fresh in every frame range
+        detector = TrackingDetector(_detector, _track_interval) if _track_interval else _detector
+        capture = cv2.VideoCapture(path)
+        if start:
+            capture.set(cv2.CAP_PROP_POS_FRAMES, start)
+        index = start
+        while stop is None or index < stop:
+            ok, frame = capture.read()
+            if not ok:
+                break
+            records.append(_record(path, index, detector.detect(frame)))
+            index += 1
+        capture.release()
+    else:
+        for path in task[1]:
+            frame = cv2.imread(path)
+            if frame is None:
+                print(f"Could not read image: {path}")
+                continue
+            records.append(_record(path, 0, _detector.detect(frame)))
+    return records, time.perf_counter() - start_time
+
+
+class JsonlWriter:
+    def __init__(self, path):
+        self.file = open(path, 'w')
+
+    def write(self, records):
+        for record in records:
+            self.file.write(json.dumps(record) + '\n')
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetWriter:
+    """One row per frame; faces are stored as a JSON string column"""
+
+    def __init__(self, path):
+        try:
+            import pandas as pd  # noqa: F401
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise RuntimeError("Parquet output needs pandas and pyarrow; use a .jsonl output instead") from None
+        self.path = path
+        self.rows = []
+
+    def write(self, records):
+        self.rows.extend(
+            {'source': r['source'], 'frame': r['frame'], 'n_faces': len(r['faces']),
+             'faces': json.dumps(r['faces'])}
+            for r in records
+        )
+
+    def close(self):
+        import pandas as pd
+        pd.DataFrame(self.rows, columns=['source', 'frame', 'n_faces', 'faces']).to_parquet(self.path, index=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('inputs', nargs='+', help='video files, images or folders of them')
+    parser.add_argument('--output', default='detections.jsonl', help='.jsonl or .parquet file')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--chunk-frames', type=int, default=CHUNK_FRAMES,
+                        help='frames or images per worker task')
+    parser.add_argument('--track', type=int, default=0, metavar='N',
+                        help='in videos, full-frame detection only every N frames (see tracking.py)')
+    parser.add_argument('--profile', choices=list(PROFILES), default=DEFAULT_PROFILE,
+                        help='detection speed/accuracy preset (see detector.py)')
+    args = parser.parse_args()
+
+    videos, images = find_inputs(args.inputs)
+    tasks = plan_tasks(videos, images, args.chunk_frames)
+    if not tasks:
+        print("No videos or images found")
+        exit(1)
+
+    try:
+        writer = ParquetWriter(args.output) if args.output.endswith('.parquet') else JsonlWriter(args.output)
+    except RuntimeError as e:
+        print(f"Error: {e}")
+        exit(1)
+    print(f"{len(videos)} videos, {len(images)} images in {len(tasks)} tasks on {args.workers} workers")
+
+    n_frames, n_faces, busy = 0, 0, 0.0
+    start = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(args.workers, initializer=_init_worker, initargs=(args.track, args.profile)) as executor:
+            # map keeps task order, so the output is sorted by source and frame
+            for records, seconds in executor.map(run_task, tasks):
+                writer.write(records)
+                n_frames += len(records)
+                n_faces += sum(len(record['faces']) for record in records)
+                busy += seconds
+    finally:
+        writer.close()
+    elapsed = time.perf_counter() - start
+
+    print(f"{n_frames} frames, {n_faces} faces in {elapsed:.1f}s")
+    print(f"Throughput: {n_frames / elapsed:.1f} frames/s overall, "
+          f"{n_frames / elapsed / args.workers:.1f} frames/s per worker")
+    if busy > 0:
+        # Busy time excludes pool start-up and idle workers at the tail
+        print(f"Per core while busy: {n_frames / busy:.1f} frames/s")
+    print(f"Detections written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
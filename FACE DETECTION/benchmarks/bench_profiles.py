@@ -0,0 +1,108 @@
+"""Accuracy and speed of each detection profile on a labelled image set.
+
+The labels file is JSONL, one image per line, with paths relative to it:
+
+  {"image": "faces/0001.jpg", "faces": [[x, y, w, h], ...]}
+
+Each image can be rescaled to several heights (labels scale with it) to
+show how the presets hold up across camera resolutions. A detection counts
+as correct when it overlaps a labelled face with IoU >= --iou.
+
+Usage: python benchmarks/bench_profiles.py LABELS.jsonl [--heights 480 720 1080]
+                                           [--profiles full accurate balanced fast]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from detector import PROFILES, FaceDetector, match_boxes, to_gray  # noqa: E402
+
+
+def load_samples(labels_path):
+    base = os.path.dirname(os.path.abspath(labels_path))
+    samples = []
+    with open(labels_path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            image = cv2.imread(os.path.join(base, entry['image']))
+            if image is None:
+                print(f"Could not read image: {entry['image']}")
+                continue
+            samples.append((to_gray(image), [tuple(face) for face in entry['faces']]))
+    return samples
+
+
+def rescale(samples, height):
+    """Samples resized to the given height, or unchanged for None"""
+    if height is None:
+        return samples
+    resized = []
+    for gray, faces in samples:
+        scale = height / gray.shape[0]
+        size = (max(1, round(gray.shape[1] * scale)), height)
+        interpolation = cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR
+        resized.append((
+            cv2.resize(gray, size, interpolation=interpolation),
+            [tuple(round(v * scale) for v in face) for face in faces]
+        ))
+    return resized
+
+
+def evaluate(detector, samples, threshold):
+    timings, matched, n_detected, n_labelled = [], 0, 0, 0
+    for gray, faces in samples:
+        start = time.perf_counter()
+        detections = detector.detect(gray)
+        timings.append(time.perf_counter() - start)
+        boxes = [d['box'] for d in detections]
+        matched += len(match_boxes(boxes, faces, threshold))
+        n_detected += len(boxes)
+        n_labelled += len(faces)
+
+    precision = matched / n_detected if n_detected else float('nan')
+    recall = matched / n_labelled if n_labelled else float('nan')
+    return {
+        'fps': len(samples) / sum(timings),
+        'p50_ms': float(np.percentile(timings, 50)) * 1000,
+        'precision': precision,
+        'recall': recall,
+        'f1': 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('labels')
+    parser.add_argument('--heights', type=int, nargs='+', default=None,
+                        help='rescale images to these heights (default: as stored)')
+    parser.add_argument('--profiles', nargs='+', choices=list(PROFILES), default=list(PROFILES))
+    parser.add_argument('--iou', type=float, default=0.5)
+    args = parser.parse_args()
+
+    samples = load_samples(args.labels)
+    if not samples:
+        print("No labelled images found")
+        exit(1)
+    detectors = {profile: FaceDetector(profile=profile) for profile in args.profiles}
+
+    print(f"{len(samples)} images, {sum(len(faces) for _, faces in samples)} labelled faces")
+    print(f"{'height':>7} {'profile':<9} {'fps':>7} {'p50 ms':>7} {'precision':>9} {'recall':>7} {'f1':>6}")
+    for height in args.heights or [None]:
+        scaled = rescale(samples, height)
+        for profile, detector in detectors.items():
+            result = evaluate(detector, scaled, args.iou)
+            print(f"{height or 'orig':>7} {profile:<9} {result['fps']:>7.1f} {result['p50_ms']:>7.1f} "
+                  f"{result['precision']:>9.3f} {result['recall']:>7.3f} {result['f1']:>6.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""Aggregate throughput and per-stream latency of detection_server.py.
+
+Runs the server (without HTTP) on N copies of a clip for each worker
+count. By default the clips are read as fast as possible with the 'queue'
+policy, which measures capacity; --realtime paces them at their frame
+rate with the 'latest' policy, which measures latency and skipping under
+a live load.
+
+Usage: python benchmarks/bench_server.py CLIP [--streams 4] [--workers 1 2 4]
+                                         [--duration 10] [--realtime]
+"""
+import argparse
+import os
+import sys
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from detection_server import DetectionServer, Stream  # noqa: E402
+from detector import DEFAULT_PROFILE, PROFILES, FaceDetector  # noqa: E402
+
+
+def measure(clip, n_streams, workers, duration, realtime, profile):
+    policy = 'latest' if realtime else 'queue'
+    streams = [
+        Stream(f'stream{i}', clip, FaceDetector(profile=profile), policy, realtime=realtime, loop=True)
+        for i in range(n_streams)
+    ]
+    server = DetectionServer(streams, workers, port=None)
+    server.start()
+    server.wait(duration)
+    summary = server.summary()
+    server.stop()
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('clip')
+    parser.add_argument('--streams', type=int, default=4)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--realtime', action='store_true')
+    parser.add_argument('--profile', choices=list(PROFILES), default=DEFAULT_PROFILE)
+    args = parser.parse_args()
+
+    cv2.setNumThreads(1)
+    print(f"{args.streams} streams of {os.path.basename(args.clip)}, {os.cpu_count()} CPUs")
+    print(f"{'workers':>7} {'fps':>8} {'scaling':>8} {'stream fps min/max':>19} "
+          f"{'p50 ms':>7} {'p95 ms':>7} {'skipped':>8}")
+    baseline = None
+    for workers in args.workers:
+        summary = measure(args.clip, args.streams, workers, args.duration, args.realtime, args.profile)
+        streams = summary['streams'].values()
+        stream_fps = [s['fps'] for s in streams]
+        baseline = baseline or summary['fps']
+        # Worst stream, so one starved stream is not hidden by the others
+        p50 = max(s['latency_p50_ms'] or np.nan for s in streams)
+        p95 = max(s['latency_p95_ms'] or np.nan for s in streams)
+        print(f"{workers:>7} {summary['fps']:>8.1f} {summary['fps'] / baseline:>7.2f}x "
+              f"{min(stream_fps):>9.1f}/{max(stream_fps):<9.1f} {p50:>7.1f} {p95:>7.1f} "
+              f"{summary['skipped']:>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""FPS, box stability and agreement of detect-then-track vs full detection.
+
+Clips are decoded into memory first, so only detection is timed. Full
+detection on every frame is the reference; for each tracking interval the
+report shows:
+  fps        detection frames per second
+  speedup    fps relative to full detection
+  full %     share of frames that still needed a full-frame scan
+  recall     reference faces matched by a tracked box (IoU >= 0.5)
+  precision  tracked boxes matching a reference face
+  jitter     mean |second difference| of box centres between frames,
+             as a share of box width (lower is steadier)
+  iou        mean IoU of a face's box in consecutive frames
+
+Usage: python benchmarks/bench_tracking.py CLIP [CLIP ...] [--intervals 5 10 20]
+                                           [--max-frames 600]
+"""
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from detector import FaceDetector, iou, match_boxes  # noqa: E402
+from tracking import TrackingDetector  # noqa: E402
+
+def load_frames(path, max_frames):
+    capture = cv2.VideoCapture(path)
+    if not capture.isOpened():
+        raise RuntimeError(f"Could not open video: {path}")
+    frames = []
+    while len(frames) < max_frames:
+        ok, frame = capture.read()
+        if not ok:
+            break
+        frames.append(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY))
+    capture.release()
+    return frames
+
+
+def run(detector, frames):
+    boxes = []
+    start = time.perf_counter()
+    for frame in frames:
+        boxes.append([d['box'] for d in detector.detect(frame)])
+    return boxes, time.perf_counter() - start
+
+
+def _centre(box):
+    return np.array([box[0] + box[2] / 2, box[1] + box[3] / 2])
+
+
+def stability(boxes):
+    """(mean centre jitter / width, mean consecutive IoU) over faces followed across frames"""
+    jitters, ious = [], []
+    for before, current, after in zip(boxes, boxes[1:], boxes[2:]):
+        for box, previous in match_boxes(current, before, 0.3):
+            ious.append(iou(box, previous))
+            following = match_boxes([box], after, 0.3)
+            if following:
+                second_diff = _centre(following[0][1]) - 2 * _centre(box) + _centre(previous)
+                jitters.append(np.linalg.norm(second_diff) / box[2])
+    return (float(np.mean(jitters)) if jitters else float('nan'),
+            float(np.mean(ious)) if ious else float('nan'))
+
+
+def agreement(boxes, reference):
+    matched = sum(len(match_boxes(b, r)) for b, r in zip(boxes, reference))
+    n_boxes = sum(map(len, boxes))
+    n_reference = sum(map(len, reference))
+    return (matched / n_reference if n_reference else float('nan'),
+            matched / n_boxes if n_boxes else float('nan'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('clips', nargs='+')
+    parser.add_argument('--intervals', type=int, nargs='+', default=[5, 10, 20])
+    parser.add_argument('--max-frames', type=int, default=600)
+    args = parser.parse_args()
+
+    detector = FaceDetector()
+    print(f"{'clip':<24} {'mode':<9} {'fps':>7} {'speedup':>8} {'full %':>7} "
+          f"{'recall':>7} {'precision':>9} {'jitter':>7} {'iou':>6}")
+    for path in args.clips:
+        frames = load_frames(path, args.max_frames)
+        if not frames:
+            print(f"No frames in {path}")
+            continue
+        name = os.path.basename(path)[:24]
+
+        reference, seconds = run(detector, frames)
+        full_fps = len(frames) / seconds
+        jitter, mean_iou = stability(reference)
+        print(f"{name:<24} {'full':<9} {full_fps:>7.1f} {1:>7.2f}x {100:>6.0f}% "
+              f"{1:>7.3f} {1:>9.3f} {jitter:>7.3f} {mean_iou:>6.3f}")
+
+        for interval in args.intervals:
+            tracker = TrackingDetector(detector, detect_interval=interval)
+            boxes, seconds = run(tracker, frames)
+            fps = len(frames) / seconds
+            recall, precision = agreement(boxes, reference)
+            jitter, mean_iou = stability(boxes)
+            print(f"{name:<24} {f'track/{interval}':<9} {fps:>7.1f} {fps / full_fps:>7.2f}x "
+                  f"{100 * tracker.full_scans / len(frames):>6.0f}% "
+                  f"{recall:>7.3f} {precision:>9.3f} {jitter:>7.3f} {mean_iou:>6.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,332 @@
+"""Face detection service over several camera or video sources at once.
+
+Each source has a capture thread; a shared pool of worker threads takes
+frames from the streams in round-robin order, with at most one frame of a
+stream in flight, so every stream gets an equal share of the workers and
+its results stay in order. Under overload each stream's frame-skip policy
+decides what is dropped:
+
+  latest     keep only the newest unprocessed frame (the default)
+  every:N    offer every Nth frame, then behave like latest
+  queue      buffer up to QUEUE_SIZE frames and slow capture instead of
+             skipping (for files that must be processed completely)
+
+Results and per-stream stats are served as JSON over HTTP:
+
+  GET /streams           stats for every stream, plus the aggregate
+  GET /streams/<name>    latest detections of one stream
+
+Video files stand in for network streams: they are read at their own
+frame rate unless --no-realtime is given.
+
+Usage: python detection_server.py [NAME=]SOURCE[#POLICY] ... [--workers N]
+                                  [--port 8765] [--profile full] [--track N]
+                                  [--loop] [--duration SECONDS]
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+
+from detector import DEFAULT_PROFILE, PROFILES, FaceDetector
+from pipeline import StageStats, open_source
+from tracking import TrackingDetector
+
+# Frames buffered per stream under the 'queue' policy
+QUEUE_SIZE = 8
+
+
+class Stream:
+    def __init__(self, name, source, detector, policy='latest', realtime=True, loop=False):
+        self.name = name
+        self.source = source
+        self.detector = detector
+        self.every = 1
+        if policy.startswith('every:'):
+            self.every = int(policy.split(':', 1)[1])
+            policy = 'latest'
+        if policy not in ('latest', 'queue') or self.every < 1:
+            raise ValueError(f"Unknown frame-skip policy for stream {name}: {policy}")
+        self.policy = policy
+        self.realtime = realtime
+        self.loop = loop
+
+        # Guarded by the scheduler's lock
+        self.pending = deque()
+        self.in_flight = False
+        self.finished = False
+        self.captured = 0
+        self.skipped = 0
+
+        self.processed = 0
+        self.latest = None
+        self.latency = StageStats('latency')
+        self.detect_time = StageStats('detect')
+
+    def summary(self, elapsed):
+        latency = self.latency.summary(elapsed)
+        return {
+            'source': str(self.source),
+            'policy': self.policy if self.every == 1 else f'every:{self.every}',
+            'captured': self.captured,
+            'processed': self.processed,
+            'skipped': self.skipped,
+            'fps': latency['fps'],
+            'latency_p50_ms': latency.get('p50_ms'),
+            'latency_p95_ms': latency.get('p95_ms'),
+            'detect_p50_ms': self.detect_time.summary(elapsed).get('p50_ms'),
+            'finished': self.finished
+        }
+
+
+class StreamScheduler:
+    """Hands pending frames to workers round-robin across streams"""
+
+    def __init__(self, streams):
+        self.streams = streams
+        self._cond = threading.Condition()
+        self._next = 0
+        self._closed = False
+
+    def offer(self, stream, item):
+        """Called by a stream's capture thread with (index, captured_at, frame)"""
+        with self._cond:
+            stream.captured += 1
+            if item[0] % stream.every:
+                stream.skipped += 1
+                return
+            if stream.policy == 'queue':
+                while len(stream.pending) >= QUEUE_SIZE and not self._closed:
+                    self._cond.wait()
+            elif stream.pending:
+                # The frame still waiting is now stale
+                stream.pending.clear()
+                stream.skipped += 1
+            stream.pending.append(item)
+            self._cond.notify_all()
+
+    def take(self):
+        """(stream, item) for the next stream in turn, or None once all streams are done"""
+        with self._cond:
+            while True:
+                n_streams = len(self.streams)
+                for offset in range(n_streams):
+                    stream = self.streams[(self._next + offset) % n_streams]
+                    if stream.pending and not stream.in_flight:
+                        self._next = (self._next + offset + 1) % n_streams
+                        stream.in_flight = True
+                        item = stream.pending.popleft()
+                        # A capture thread may be waiting for queue space
+                        self._cond.notify_all()
+                        return stream, item
+                if self._closed or all(s.finished and not s.pending for s in self.streams):
+                    return None
+                self._cond.wait()
+
+    def done(self, stream):
+        with self._cond:
+            stream.in_flight = False
+            self._cond.notify_all()
+
+    def finish(self, stream):
+        with self._cond:
+            stream.finished = True
+            self._cond.notify_all()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+class DetectionServer:
+    def __init__(self, streams, workers=os.cpu_count() or 1, host='127.0.0.1', port=8765):
+        self.streams = streams
+        self.by_name = {stream.name: stream for stream in streams}
+        if len(self.by_name) != len(streams):
+            raise ValueError("Stream names must be unique")
+        self.workers = workers
+        self.scheduler = StreamScheduler(streams)
+        self.http = ThreadingHTTPServer((host, port), _handler(self)) if port is not None else None
+        self._stop = threading.Event()
+        self._threads = []
+        self._started = None
+
+    def start(self):
+        self._started = time.perf_counter()
+        self._threads = [threading.Thread(target=self._capture, args=(s,), daemon=True) for s in self.streams]
+        self._threads += [threading.Thread(target=self._work, daemon=True) for _ in range(self.workers)]
+        if self.http is not None:
+            threading.Thread(target=self.http.serve_forever, daemon=True).start()
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self.scheduler.close()
+        for thread in self._threads:
+            thread.join(timeout=5)
+        if self.http is not None:
+            self.http.shutdown()
+            self.http.server_close()
+
+    def wait(self, duration=None):
+        """Block until every stream has ended and been processed, or duration passes"""
+        deadline = None if duration is None else time.perf_counter() + duration
+        workers = self._threads[len(self.streams):]
+        while any(thread.is_alive() for thread in workers):
+            if deadline is not None and time.perf_counter() >= deadline:
+                return
+            time.sleep(0.1)
+
+    def _capture(self, stream):
+        try:
+            capture = open_source(stream.source)
+        except RuntimeError as e:
+            print(f"Stream {stream.name}: {e}")
+            self.scheduler.finish(stream)
+            return
+        is_file = not isinstance(stream.source, int) and os.path.exists(stream.source)
+        fps = capture.get(cv2.CAP_PROP_FPS) or 30.0
+        pace = 1 / fps if stream.realtime and is_file else 0
+        index, read_in_pass = 0, 0
+        next_due = time.perf_counter()
+        try:
+            while not self._stop.is_set():
+                ok, frame = capture.read()
+                if not ok:
+                    if stream.loop and is_file and read_in_pass:
+                        capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                        read_in_pass = 0
+                        continue
+                    break
+                read_in_pass += 1
+                if pace:
+                    next_due += pace
+                    time.sleep(max(0.0, next_due - time.perf_counter()))
+                self.scheduler.offer(stream, (index, time.perf_counter(), frame))
+                index += 1
+        finally:
+            capture.release()
+            self.scheduler.finish(stream)
+
+    def _work(self):
+        while True:
+            job = self.scheduler.take()
+            if job is None:
+                return
+            stream, (index, captured_at, frame) = job
+            try:
+                start = time.perf_counter()
+                detections = stream.detector.detect(frame)
+                now = time.perf_counter()
+                stream.detect_time.record(now - start)
+                stream.latency.record(now - captured_at)
+                stream.processed += 1
+                stream.latest = {'frame': index, 'latency_ms': (now - captured_at) * 1000,
+                                 'faces': detections}
+            except Exception as e:
+                print(f"Stream {stream.name}: detection failed on frame {index}: {e}")
+            finally:
+                self.scheduler.done(stream)
+
+    def summary(self):
+        elapsed = time.perf_counter() - self._started if self._started else 0.0
+        streams = {stream.name: stream.summary(elapsed) for stream in self.streams}
+        processed = sum(stream['processed'] for stream in streams.values())
+        return {
+            'seconds': elapsed,
+            'workers': self.workers,
+            'fps': processed / elapsed if elapsed > 0 else 0.0,
+            'processed': processed,
+            'skipped': sum(stream['skipped'] for stream in streams.values()),
+            'streams': streams
+        }
+
+
+def _handler(server):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            parts = self.path.split('?', 1)[0].strip('/').split('/')
+            if parts == ['streams']:
+                self._send(200, server.summary())
+            elif len(parts) == 2 and parts[0] == 'streams' and parts[1] in server.by_name:
+                stream = server.by_name[parts[1]]
+                self._send(200, {'stream': stream.name, 'result': stream.latest})
+            else:
+                self._send(404, {'error': 'Not found'})
+
+        def _send(self, status, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def parse_source(spec, position):
+    """'[name=]source[#policy]' -> (name, source, policy)"""
+    policy = 'latest'
+    if '#' in spec:
+        head, tail = spec.rsplit('#', 1)
+        if tail in ('latest', 'queue') or tail.startswith('every:'):
+            spec, policy = head, tail
+    name, source = spec.split('=', 1) if '=' in spec else (f'stream{position}', spec)
+    return name, int(source) if source.isdigit() else source, policy
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('sources', nargs='+', help='[NAME=]SOURCE[#latest|#every:N|#queue]')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='detector threads')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--profile', choices=list(PROFILES), default=DEFAULT_PROFILE)
+    parser.add_argument('--track', type=int, default=0, metavar='N',
+                        help='full-frame detection only every N processed frames per stream')
+    parser.add_argument('--no-realtime', action='store_true', help='read video files as fast as possible')
+    parser.add_argument('--loop', action='store_true', help='restart video files when they end')
+    parser.add_argument('--duration', type=float, default=None, help='stop after this many seconds')
+    args = parser.parse_args()
+
+    # Parallelism comes from the worker pool; nested OpenCV threads would oversubscribe
+    cv2.setNumThreads(1)
+
+    try:
+        streams = []
+        for position, spec in enumerate(args.sources):
+            name, source, policy = parse_source(spec, position)
+            # Streams are processed one frame at a time, so each can own its detector
+            detector = FaceDetector(profile=args.profile)
+            if args.track:
+                detector = TrackingDetector(detector, detect_interval=args.track)
+            streams.append(Stream(name, source, detector, policy, not args.no_realtime, args.loop))
+        server = DetectionServer(streams, args.workers, args.host, args.port)
+    except (ValueError, RuntimeError, OSError) as e:
+        print(f"Error: {e}")
+        exit(1)
+    server.start()
+    print(f"Serving {len(streams)} streams on http://{args.host}:{args.port}/streams "
+          f"with {args.workers} workers")
+    try:
+        server.wait(args.duration)
+    except KeyboardInterrupt:
+        pass
+    summary = server.summary()
+    server.stop()
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == '__main__':
+    main()
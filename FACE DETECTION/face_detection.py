@@ -1,45 +1,65 @@
-import cv2
+"""Face and smile detection from a webcam or a video file.
 
-face_cascade = cv2.CascadeClassifier('haarcascade_frontalface_default.xml')
-smile_cascade = cv2.CascadeClassifier('haarcascade_smile.xml')
+Capture, detection and display run as separate stages (see pipeline.py),
+so a slow detector no longer stalls the camera.
 
-if face_cascade.empty() or smile_cascade.empty():
-    print("Error loading cascade files")
-    exit()
+Usage: python face_detection.py [--source 0] [--workers 2] [--headless]
+                                [--output annotated.mp4] [--keep-all-frames]
+                                [--track 10] [--profile full]
+"""
+import argparse
+import json
+import os
 
-camera = cv2.VideoCapture(0)
-if not camera.isOpened():
-    print("Error: Could not open webcam.")
-    exit()
+from detector import DEFAULT_PROFILE, PROFILES, FaceDetector
+from pipeline import Pipeline
+from tracking import TrackingDetector
 
-while True:
-    ret, frame = camera.read()
-    if not ret:
-        break
 
-    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--source', default='0', help='camera index or video file (default: webcam 0)')
+    parser.add_argument('--workers', type=int, default=2, help='detector threads')
+    parser.add_argument('--headless', action='store_true', help='no window; for servers and tests')
+    parser.add_argument('--output', default=None, help='write annotated frames to this video file')
+    parser.add_argument('--keep-all-frames', action='store_true',
+                        help='process every frame in order instead of dropping stale ones '
+                             '(the default for video files)')
+    parser.add_argument('--report-interval', type=float, default=5.0, help='seconds between FPS reports')
+    parser.add_argument('--track', type=int, default=0, metavar='N',
+                        help='full-frame detection only every N frames, tracking faces in between')
+    parser.add_argument('--profile', choices=list(PROFILES), default=DEFAULT_PROFILE,
+                        help='detection speed/accuracy preset (see detector.py)')
+    args = parser.parse_args()
 
-    faces = face_cascade.detectMultiScale(gray, 1.1, 5)
+    def detector_factory():
+        detector = FaceDetector(profile=args.profile)
+        return TrackingDetector(detector, detect_interval=args.track) if args.track else detector
 
-    for (x, y, w, h) in faces:
-        cv2.rectangle(frame, (x,y), (x+w, y+h), (255,0,0), 2)  # Blue rectangle for face
+    # Tracking follows faces from frame to frame, so frames must arrive in order
+    if args.track and args.workers != 1:
+        print("Tracking uses a single detector worker")
+        args.workers = 1
 
-        roi_gray = gray[y:y+h, x:x+w]
-        roi_color = frame[y:y+h, x:x+w]
+    is_file = os.path.exists(args.source)
+    pipeline = Pipeline(
+        args.source,
+        workers=args.workers,
+        drop_frames=not (args.keep_all_frames or is_file),
+        display=not args.headless,
+        output=args.output,
+        report_interval=args.report_interval,
+        detector_factory=detector_factory
+    )
+    try:
+        summary = pipeline.run()
+    except RuntimeError as e:
+        print(f"Error: {e}")
+        exit(1)
+    except KeyboardInterrupt:
+        summary = pipeline.summary()
+    print(json.dumps(summary, indent=2))
 
-        smiles = smile_cascade.detectMultiScale(roi_gray, scaleFactor=1.7, minNeighbors=22)
 
-        if len(smiles) > 0:
-            cv2.putText(frame, "Smiling :)", (x, y-10), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0,255,0), 2)
-            for (sx, sy, sw, sh) in smiles:
-                cv2.rectangle(roi_color, (sx, sy), (sx+sw, sy+sh), (0,255,0), 2)
-        else:
-            cv2.putText(frame, "Not Smiling", (x, y-10), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0,0,255), 2)
-
-    cv2.imshow('Face and Expression Detection', frame)
-
-    if cv2.waitKey(1) & 0xFF == ord('q'):
-        break
-
-camera.release()
-cv2.destroyAllWindows()
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,282 @@
+"""Threaded capture -> detect -> output pipeline with per-stage timing.
+
+A capture thread reads frames into a bounded queue, a pool of detector
+threads (OpenCV releases the GIL inside detectMultiScale) consumes it, and
+the output stage on the calling thread draws, shows and/or writes results.
+When frames are dropped under load the oldest queued frame goes first, so
+what is shown stays close to live.
+"""
+import heapq
+import queue
+import threading
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+from detector import FaceDetector, draw_detections
+
+# Frames buffered between stages
+QUEUE_SIZE = 4
+
+# Seconds a blocked queue operation waits before checking for stop()
+POLL_INTERVAL = 0.1
+
+# Latency samples kept per stage for percentiles
+MAX_SAMPLES = 10000
+
+WINDOW_NAME = 'Face and Expression Detection'
+
+
+class DropOldestQueue(queue.Queue):
+    """Bounded queue that can discard its oldest item instead of blocking.
+
+    None is the end-of-stream sentinel and is never discarded.
+    """
+
+    def __init__(self, maxsize):
+        super().__init__(maxsize)
+        self.dropped = 0
+
+    def put_latest(self, item):
+        """Put without blocking; a full queue loses its oldest item (returned) instead"""
+        evicted = None
+        with self.not_full:
+            if 0 < self.maxsize <= self._qsize():
+                for position, queued in enumerate(self.queue):
+                    if queued is not None:
+                        evicted = queued
+                        del self.queue[position]
+                        self.dropped += 1
+                        break
+            self._put(item)
+            self.unfinished_tasks += 1
+            self.not_empty.notify()
+        return evicted
+
+
+class StageStats:
+    """Latency samples and throughput of one stage"""
+
+    def __init__(self, name, max_samples=MAX_SAMPLES):
+        self.name = name
+        self.count = 0
+        self._latencies = deque(maxlen=max_samples)
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self.count += 1
+            self._latencies.append(seconds)
+
+    def summary(self, elapsed):
+        with self._lock:
+            latencies = np.array(self._latencies) * 1000
+            count = self.count
+        if not len(latencies):
+            return {'count': 0, 'fps': 0.0}
+        return {
+            'count': count,
+            'fps': count / elapsed if elapsed > 0 else 0.0,
+            'mean_ms': float(latencies.mean()),
+            'p50_ms': float(np.percentile(latencies, 50)),
+            'p95_ms': float(np.percentile(latencies, 95))
+        }
+
+
+def open_source(source):
+    """VideoCapture for a camera index ('0', 1, ...) or a video file path"""
+    if isinstance(source, str) and source.isdigit():
+        source = int(source)
+    capture = cv2.VideoCapture(source)
+    if not capture.isOpened():
+        raise RuntimeError(f"Could not open video source {source}")
+    return capture
+
+
+class Pipeline:
+    """Run detection over one video source.
+
+    drop_frames=True keeps latency low for live cameras by discarding
+    frames the detectors cannot keep up with; False processes every frame
+    in order, which is what a video file usually wants. display shows an
+    OpenCV window (press q to stop); output writes annotated frames to a
+    video file. detector_factory builds one detector per worker thread.
+    """
+
+    def __init__(self, source, workers=2, drop_frames=True, display=True, output=None,
+                 queue_size=QUEUE_SIZE, report_interval=5.0, detector_factory=FaceDetector):
+        self.source = source
+        self.workers = workers
+        self.drop_frames = drop_frames
+        self.display = display
+        self.output = output
+        self.report_interval = report_interval
+        self.detector_factory = detector_factory
+        self.frames = DropOldestQueue(queue_size)
+        self.results = DropOldestQueue(queue_size)
+        self.stats = {name: StageStats(name) for name in ('capture', 'detect', 'output', 'end_to_end')}
+        self.stale = 0
+        self.errors = []
+        self._stop = threading.Event()
+        self._started = None
+        self._elapsed = None
+
+    def stop(self):
+        self._stop.set()
+
+    def _put(self, target, item):
+        if self.drop_frames:
+            target.put_latest(item)
+        else:
+            self._put_until_stopped(target, item)
+
+    def _put_until_stopped(self, target, item):
+        """Blocking put that gives up once stop() is called"""
+        while not self._stop.is_set():
+            try:
+                target.put(item, timeout=POLL_INTERVAL)
+                return
+            except queue.Full:
+                pass
+
+    def _capture(self, capture):
+        index = 0
+        try:
+            while not self._stop.is_set():
+                start = time.perf_counter()
+                ok, frame = capture.read()
+                if not ok:
+                    break
+                now = time.perf_counter()
+                self.stats['capture'].record(now - start)
+                self._put(self.frames, (index, now, frame))
+                index += 1
+        finally:
+            capture.release()
+            # Sentinels are never dropped; after stop() workers exit on their own
+            for _ in range(self.workers):
+                self._put_until_stopped(self.frames, None)
+
+    def _detect(self, detector):
+        try:
+            while not self._stop.is_set():
+                try:
+                    item = self.frames.get(timeout=POLL_INTERVAL)
+                except queue.Empty:
+                    continue
+                if item is None:
+                    return
+                index, captured_at, frame = item
+                start = time.perf_counter()
+                detections = detector.detect(frame)
+                self.stats['detect'].record(time.perf_counter() - start)
+                self._put(self.results, (index, captured_at, frame, detections))
+        except Exception as e:
+            # Stop the other stages; run() re-raises the first error
+            self.errors.append(e)
+            self.stop()
+        finally:
+            # Also sent when detect raises, so the output stage never waits forever
+            self.results.put(None)
+
+    def _emit(self, item, writer_state):
+        index, captured_at, frame, detections = item
+        start = time.perf_counter()
+        draw_detections(frame, detections)
+        if self.output:
+            if writer_state.get('writer') is None:
+                height, width = frame.shape[:2]
+                writer_state['writer'] = cv2.VideoWriter(
+                    self.output, cv2.VideoWriter_fourcc(*'mp4v'), writer_state['fps'], (width, height)
+                )
+            writer_state['writer'].write(frame)
+        if self.display:
+            cv2.imshow(WINDOW_NAME, frame)
+            if cv2.waitKey(1) & 0xFF == ord('q'):
+                self.stop()
+        now = time.perf_counter()
+        self.stats['output'].record(now - start)
+        self.stats['end_to_end'].record(now - captured_at)
+
+    def run(self):
+        """Process the source until it ends or stop() is called; returns summary()"""
+        # Detectors are built up front so a bad cascade fails before any thread starts
+        detectors = [self.detector_factory() for _ in range(self.workers)]
+        capture = open_source(self.source)
+        writer_state = {'fps': capture.get(cv2.CAP_PROP_FPS) or 30.0}
+        threads = [threading.Thread(target=self._capture, args=(capture,), daemon=True)]
+        threads += [threading.Thread(target=self._detect, args=(detector,), daemon=True)
+                    for detector in detectors]
+
+        self._started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+
+        # Workers finish out of order: in drop mode anything older than the
+        # last shown frame is stale, otherwise frames are re-sequenced
+        pending = []
+        next_index = 0
+        finished = 0
+        last_report = self._started
+        try:
+            while finished < self.workers:
+                item = self.results.get()
+                if item is None:
+                    finished += 1
+                    continue
+                if self._stop.is_set():
+                    continue
+                if self.drop_frames:
+                    if item[0] < next_index:
+                        self.stale += 1
+                        continue
+                    next_index = item[0] + 1
+                    self._emit(item, writer_state)
+                else:
+                    heapq.heappush(pending, (item[0], id(item), item))
+                    while pending and pending[0][0] == next_index:
+                        self._emit(heapq.heappop(pending)[2], writer_state)
+                        next_index += 1
+
+                if self.report_interval and time.perf_counter() - last_report >= self.report_interval:
+                    last_report = time.perf_counter()
+                    self.report()
+            # Frames stuck behind one a failed worker never delivered
+            while pending and not self._stop.is_set():
+                self._emit(heapq.heappop(pending)[2], writer_state)
+        finally:
+            self.stop()
+            # After an error, keep draining results so blocked workers can finish
+            while any(thread.is_alive() for thread in threads):
+                try:
+                    self.results.get(timeout=0.01)
+                except queue.Empty:
+                    pass
+            if writer_state.get('writer') is not None:
+                writer_state['writer'].release()
+            if self.display:
+                cv2.destroyAllWindows()
+        self._elapsed = time.perf_counter() - self._started
+        if self.errors:
+            raise RuntimeError(f"Detection failed: {self.errors[0]!r}") from self.errors[0]
+        return self.summary()
+
+    def summary(self):
+        elapsed = self._elapsed or time.perf_counter() - self._started
+        return {
+            'seconds': elapsed,
+            'fps': self.stats['output'].count / elapsed if elapsed > 0 else 0.0,
+            'dropped_frames': self.frames.dropped,
+            'dropped_results': self.results.dropped,
+            'stale_results': self.stale,
+            'stages': {name: stats.summary(elapsed) for name, stats in self.stats.items()}
+        }
+
+    def report(self):
+        summary = self.summary()
+        stages = ', '.join(
+            f"{name} {stage['p50_ms']:.1f}ms" for name, stage in summary['stages'].items() if stage['count']
+        )
+        print(f"{summary['fps']:.1f} fps, dropped {summary['dropped_frames']}, p50: {stages}")
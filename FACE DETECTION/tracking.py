@@ -0,0 +1,77 @@
+"""Detect-then-track: full cascade scans only every few frames.
+
+Between full scans each known face is searched for only in a padded
+window around its last box, with the cascade limited to sizes close to the
+face's last size, which is a small fraction of a full-frame scan. A face
+not found in its window counts as lost confidence and forces a full scan
+on the same frame. Faces entering the picture are picked up by the next
+scheduled full scan.
+
+Tracking needs frames in order, so use one TrackingDetector per sequence
+(one pipeline worker, or one batch task).
+"""
+from detector import FaceDetector, to_gray
+
+# Frames between full-frame scans
+DETECT_INTERVAL = 10
+
+# Search window margin around the last box, as a share of its size
+ROI_PADDING = 0.5
+
+# Allowed change in face size between consecutive frames
+SIZE_TOLERANCE = 0.25
+
+
+class TrackingDetector:
+    def __init__(self, detector=None, detect_interval=DETECT_INTERVAL,
+                 padding=ROI_PADDING, size_tolerance=SIZE_TOLERANCE):
+        self.detector = detector or FaceDetector()
+        self.detect_interval = detect_interval
+        self.padding = padding
+        self.size_tolerance = size_tolerance
+        self.boxes = []
+        self.since_full_scan = None
+        self.full_scans = 0
+        self.roi_scans = 0
+
+    def reset(self):
+        self.boxes = []
+        self.since_full_scan = None
+
+    def detect(self, frame):
+        """Same result shape as FaceDetector.detect"""
+        gray = to_gray(frame)
+        due = self.since_full_scan is None or self.since_full_scan + 1 >= self.detect_interval
+        boxes = None if due else self._track(gray)
+        if boxes is None:
+            boxes = self.detector.find_faces(gray)
+            self.full_scans += 1
+            self.since_full_scan = 0
+        else:
+            self.since_full_scan += 1
+        self.boxes = boxes
+        return [self.detector.describe(gray, box) for box in boxes]
+
+    def _track(self, gray):
+        """Each known face re-found near its last box, or None if any is lost"""
+        height, width = gray.shape[:2]
+        tracked = []
+        for x, y, w, h in self.boxes:
+            pad_x, pad_y = int(w * self.padding), int(h * self.padding)
+            left, top = max(0, x - pad_x), max(0, y - pad_y)
+            right, bottom = min(width, x + w + pad_x), min(height, y + h + pad_y)
+            self.roi_scans += 1
+            candidates = self.detector.detect_faces(
+                gray[top:bottom, left:right],
+                minSize=(int(w * (1 - self.size_tolerance)), int(h * (1 - self.size_tolerance))),
+                maxSize=(int(w * (1 + self.size_tolerance)) + 1, int(h * (1 + self.size_tolerance)) + 1)
+            )
+            if not candidates:
+                return None
+            # The candidate whose centre is closest to the last one
+            cx, cy = x + w / 2 - left, y + h / 2 - top
+            bx, by, bw, bh = min(
+                candidates, key=lambda c: (c[0] + c[2] / 2 - cx) ** 2 + (c[1] + c[3] / 2 - cy) ** 2
+            )
+            tracked.append((bx + left, by + top, bw, bh))
+        return tracked